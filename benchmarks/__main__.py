@@ -0,0 +1,152 @@
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from common.db import get_db_config
+from common.log import logger
+
+BENCH_USERS = int(os.getenv("BENCH_USERS", "50"))
+BENCH_DAYS = int(os.getenv("BENCH_DAYS", "365"))
+BENCH_PROJECTS = int(os.getenv("BENCH_PROJECTS", "4"))
+BENCH_SEED = int(os.getenv("BENCH_SEED", "42"))
+BENCH_SUBMITTED_FRACTION = float(os.getenv("BENCH_SUBMITTED_FRACTION", "0.3"))
+BENCH_REPEAT = int(os.getenv("BENCH_REPEAT", "10"))
+BENCH_SUITES = [suite.strip() for suite in
+                os.getenv("BENCH_SUITES", "import,micro,nodes,process,submit,team_submit,load,setup").split(",")
+                if suite.strip()]
+BENCH_SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000").split(",")]
+BENCH_SERIALIZATION_SIZES = [int(size) for size in os.getenv("BENCH_SERIALIZATION_SIZES", "1000,5000").split(",")]
+BENCH_TEAM_SIZE = int(os.getenv("BENCH_TEAM_SIZE", "10"))
+BENCH_CONCURRENCY_LEVELS = sorted({int(level) for level in os.getenv("BENCH_CONCURRENCY_LEVELS", "1,4,8,16").split(",")})
+# Row counts of the import throughput sweep; each replaces em_data before the suites' own seed
+BENCH_IMPORT_SIZES = [int(size) for size in os.getenv("BENCH_IMPORT_SIZES", "10000,100000,1000000").split(",")
+                      if size.strip()]
+BENCH_OUTPUT = os.getenv("BENCH_OUTPUT")
+BENCH_LOG_LEVEL = os.getenv("BENCH_LOG_LEVEL", "WARNING").upper()
+
+# Seeding truncates em_data, so only local databases are used unless explicitly allowed
+BENCH_ALLOW_REMOTE = os.getenv("BENCH_ALLOW_REMOTE", "0") == "1"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+DATABASE_SUITES = {"import", "nodes", "process", "submit", "team_submit", "load", "setup"}
+E2E_SUITES = ["process", "submit", "team_submit", "load", "setup"]
+
+
+def git_commit():
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=repo_dir).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata():
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "suites": BENCH_SUITES,
+        "repeat": BENCH_REPEAT,
+        "import_sizes": BENCH_IMPORT_SIZES,
+        "concurrency_levels": BENCH_CONCURRENCY_LEVELS,
+        "dataset": {
+            "users": BENCH_USERS, "days": BENCH_DAYS, "projects": BENCH_PROJECTS, "seed": BENCH_SEED,
+            "submitted_fraction": BENCH_SUBMITTED_FRACTION,
+        },
+        "settings": {name: os.getenv(name) for name in (
+            "DB_POOL_SIZE", "WORKFLOW_MAX_WORKERS", "CHECKPOINTER_BACKEND", "PENDING_DATES_CACHE_VALIDATION",
+            "RESPONSE_COMPRESSION", "EM_SUBMISSION_CHUNK_SIZE", "IMPORT_BATCH_SIZE",
+        )},
+    }
+
+
+def benchmark_users():
+    """The seeded users each suite may write to; suites never share a user"""
+    from benchmarks.data import user_id_of
+
+    needed = 3 + BENCH_TEAM_SIZE + BENCH_CONCURRENCY_LEVELS[-1]
+    if BENCH_USERS < needed:
+        raise Exception(f"BENCH_USERS={BENCH_USERS} is too small: the suites need {needed} users")
+
+    user_ids = [user_id_of(index) for index in range(needed)]
+    return {
+        "nodes": user_ids[0],
+        "process": user_ids[1],
+        "submit": user_ids[2],
+        "team": user_ids[3:3 + BENCH_TEAM_SIZE],
+        "load": user_ids[3 + BENCH_TEAM_SIZE:],
+    }
+
+
+def check_database():
+    host = get_db_config()["host"]
+    if host not in LOCAL_HOSTS and not BENCH_ALLOW_REMOTE:
+        raise Exception(f"Refusing to seed benchmark data into {host}; point DATABASE_URL at a local MySQL "
+                        f"or set BENCH_ALLOW_REMOTE=1")
+
+
+def run():
+    from benchmarks import micro
+
+    results = {}
+    uses_database = bool(DATABASE_SUITES.intersection(BENCH_SUITES))
+
+    if uses_database:
+        from benchmarks import data, e2e, nodes
+        from common.db import get_cursor
+
+        check_database()
+        users = benchmark_users()
+
+        # The data is always reseeded: the write benchmarks consume pending dates
+        with get_cursor() as (connection, cursor):
+            if "import" in BENCH_SUITES:
+                sizes = data.import_throughput(connection, cursor, BENCH_IMPORT_SIZES, BENCH_DAYS, BENCH_PROJECTS,
+                                               BENCH_SEED, submitted_fraction=BENCH_SUBMITTED_FRACTION)
+            seeded = data.seed_em_data(connection, cursor, BENCH_USERS, BENCH_DAYS, BENCH_PROJECTS,
+                                       BENCH_SEED, submitted_fraction=BENCH_SUBMITTED_FRACTION)
+            if "import" in BENCH_SUITES:
+                results["import"] = {**seeded, "sizes": sizes}
+
+    if "micro" in BENCH_SUITES:
+        results["micro"] = micro.run(BENCH_SIZES, BENCH_SERIALIZATION_SIZES, BENCH_REPEAT)
+
+    if "nodes" in BENCH_SUITES:
+        results["nodes"] = nodes.run(users["nodes"], BENCH_REPEAT)
+
+    e2e_suites = [suite for suite in E2E_SUITES if suite in BENCH_SUITES]
+    if e2e_suites:
+        results.update(e2e.run(users, BENCH_REPEAT, e2e_suites, BENCH_CONCURRENCY_LEVELS))
+
+    return results
+
+
+def main():
+    logging.getLogger().setLevel(BENCH_LOG_LEVEL)
+    logger.setLevel(BENCH_LOG_LEVEL)
+
+    started = time.perf_counter()
+    report = {"meta": run_metadata()}
+
+    # The importer prints progress; keep stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report["results"] = run()
+    report["meta"]["duration_seconds"] = round(time.perf_counter() - started, 2)
+
+    output = json.dumps(report, indent=2, default=str)
+    if BENCH_OUTPUT:
+        with open(BENCH_OUTPUT, "w") as output_file:
+            output_file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
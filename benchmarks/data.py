@@ -0,0 +1,196 @@
+"""
+Deterministic synthetic em_data for benchmarks.
+
+Every user gets `projects` projects drawn from a shared pool and one row per
+project per calendar day. Weekends and a seeded set of company holidays are
+non-working days. Each user has submitted their EMs up to a per-user cutoff,
+with a few days before it left open, and some projects beyond the first two are
+unassigned. The same arguments always produce the same rows.
+"""
+import math
+import random
+import time
+from datetime import date, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from common.import_em_data import (IMPORT_BATCH_SIZE, chunk_rows, create_table, insert_batches, migrate_table,
+                                   sync_batches)
+from common.pending_stats import ensure_pending_stats_table, rebuild_pending_stats
+from core.utils.validation import DAILY_HOURS
+
+DEFAULT_START_DATE = date(2025, 1, 6)
+
+USER_ROLES = ["Developer", "Designer", "QA Engineer", "Team Lead"]
+TASK_TYPES = ["Development", "Design", "QA", "Testing", "Meeting", "Review"]
+BILLING_TYPES = ["Hourly", "Fixed"]
+TASK_INCHARGES = [("TI001", "Asha Rao"), ("TI002", "Vikram Shah"), ("TI003", "Meera Iyer")]
+
+# Share of a user's days before their submission cutoff that are still pending
+OPEN_DAY_RATE = 0.05
+
+
+def user_id_of(index: int) -> str:
+    return f"BU{index:05d}"
+
+
+def project_id_of(index: int) -> str:
+    return f"BP{index:04d}"
+
+
+def holidays(days: int, holiday_rate: float, seed: int, start_date: date = DEFAULT_START_DATE) -> set:
+    """Company holidays among the weekdays of the generated period"""
+    rng = random.Random(f"{seed}:holidays")
+    weekdays = [start_date + timedelta(days=offset) for offset in range(days)
+                if (start_date + timedelta(days=offset)).weekday() < 5]
+    return {day for day in weekdays if rng.random() < holiday_rate}
+
+
+def user_projects(user_index: int, projects: int, project_pool: int, unassigned_rate: float,
+                  seed: int) -> List[Tuple[int, bool]]:
+    """(project index, is_assigned) of one user; the first two projects are always assigned"""
+    rng = random.Random(f"{seed}:projects:{user_index}")
+    chosen = rng.sample(range(project_pool), min(projects, project_pool))
+    return [(project, position < 2 or rng.random() >= unassigned_rate) for position, project in enumerate(chosen)]
+
+
+def generate_rows(users: int, days: int, projects: int, seed: int = 42, submitted_fraction: float = 0.6,
+                  holiday_rate: float = 0.03, unassigned_rate: float = 0.1, project_pool: int = 0,
+                  start_date: date = DEFAULT_START_DATE) -> Iterator[Tuple]:
+    """Yield users x days x projects em_data rows ordered as EM_DATA_COLUMNS"""
+    project_pool = project_pool or projects * 5
+    holiday_dates = holidays(days, holiday_rate, seed, start_date)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    for user_index in range(users):
+        rng = random.Random(f"{seed}:user:{user_index}")
+        user_id = user_id_of(user_index)
+        user_role = USER_ROLES[user_index % len(USER_ROLES)]
+        incharge_id, incharge_name = TASK_INCHARGES[user_index % len(TASK_INCHARGES)]
+        assignments = user_projects(user_index, projects, project_pool, unassigned_rate, seed)
+        assigned_count = sum(is_assigned for _, is_assigned in assignments)
+
+        # Users are behind by different amounts; EMs are submitted for whole days, all projects at once
+        cutoff = int(days * min(1.0, submitted_fraction * rng.uniform(0.5, 1.5)))
+        submitted_days = {offset for offset in range(cutoff) if rng.random() >= OPEN_DAY_RATE}
+
+        for offset, em_date in enumerate(dates):
+            is_holiday = em_date in holiday_dates
+            is_working_day = em_date.weekday() < 5 and not is_holiday
+            is_submitted = is_working_day and offset in submitted_days
+
+            for project_index, is_assigned in assignments:
+                project_id = project_id_of(project_index)
+                hours = DAILY_HOURS // assigned_count if is_submitted and is_assigned else 0
+
+                yield (
+                    user_id, f"Bench User {user_index}", f"{user_id.lower()}@example.com", user_role,
+                    em_date, is_submitted and is_assigned,
+                    f"BC{project_index % 10:03d}", f"Bench Client {project_index % 10}",
+                    project_id, f"Bench Project {project_index}", f"P-{project_index:04d}", is_assigned,
+                    "Self", TASK_TYPES[project_index % len(TASK_TYPES)],
+                    BILLING_TYPES[project_index % len(BILLING_TYPES)], 0, 0,
+                    hours, 0,
+                    hours, 0, "Synthetic billable work" if hours else "",
+                    0, 0, "",
+                    project_index % 3 == 0, False,
+                    incharge_id, incharge_name, f"M{project_index:04d}", f"Meter {project_index}",
+                    is_working_day, is_holiday,
+                )
+
+
+def clear_caches() -> None:
+    """Drop this process's workflow caches, which may hold rows the seed replaced"""
+    from core.utils.pending_dates import pending_dates_cache
+    from core.utils.projects import project_cache
+
+    project_cache.invalidate()
+    pending_dates_cache.invalidate()
+
+
+def dataset_size(users: int, days: int, projects: int) -> int:
+    return users * days * projects
+
+
+def seed_em_data(connection, cursor, users: int, days: int, projects: int, seed: int = 42,
+                 batch_size: int = IMPORT_BATCH_SIZE, row_limit: Optional[int] = None,
+                 **options: Any) -> Dict[str, Any]:
+    """
+        Replace the contents of em_data and em_pending_stats with generated rows through
+        the importer, then time incremental syncs of the same rows: the first one
+        backfills row hashes, the second finds every row unchanged. row_limit stops
+        after that many generated rows.
+    """
+    create_table(cursor)
+    migrate_table(cursor)
+    ensure_pending_stats_table(cursor)
+    cursor.execute("TRUNCATE TABLE em_data")
+    cursor.execute("TRUNCATE TABLE em_pending_stats")
+    connection.commit()
+
+    def rows():
+        return islice(generate_rows(users, days, projects, seed, **options), row_limit)
+
+    started = time.perf_counter()
+    inserted_count, errors = insert_batches(connection, cursor, chunk_rows(rows(), batch_size))
+    insert_seconds = time.perf_counter() - started
+
+    results = {
+        "rows": inserted_count,
+        "errors": len(errors),
+        "insert": _throughput(inserted_count, insert_seconds),
+    }
+
+    for name in ("sync_backfill", "sync_unchanged"):
+        started = time.perf_counter()
+        counts = sync_batches(connection, cursor, chunk_rows(rows(), batch_size))
+        results[name] = {**_throughput(inserted_count, time.perf_counter() - started), "counts": counts}
+
+    started = time.perf_counter()
+    rebuild = rebuild_pending_stats(connection, cursor)
+    results["pending_stats_rebuild"] = {"seconds": round(time.perf_counter() - started, 3), **rebuild}
+
+    cursor.execute("ANALYZE TABLE em_data")
+    cursor.fetchall()
+    connection.commit()
+    clear_caches()
+
+    return results
+
+
+def import_throughput(connection, cursor, sizes: List[int], days: int, projects: int, seed: int = 42,
+                      batch_size: int = IMPORT_BATCH_SIZE, **options: Any) -> Dict[str, Any]:
+    """
+        seed_em_data at each of the given row counts, with as many users as each size needs,
+        so insert and sync rows/sec can be compared as the table grows. Each size replaces
+        the previous one; reseed afterwards for the other suites.
+    """
+    return {
+        str(size): seed_em_data(connection, cursor, math.ceil(size / dataset_size(1, days, projects)), days,
+                                projects, seed, batch_size, row_limit=size, **options)
+        for size in sizes
+    }
+
+
+def _throughput(row_count: int, seconds: float) -> Dict[str, Any]:
+    return {"seconds": round(seconds, 3), "rows_per_sec": round(row_count / seconds, 1) if seconds else None}
+
+
+def em_details(project_ids: List[str], dates: List[str]) -> List[Dict[str, Any]]:
+    """EM details filling DAILY_HOURS per date, split evenly across the projects"""
+    hours = DAILY_HOURS // len(project_ids)
+    return [
+        {"date": em_date, "project_id": project_id, "hours": hours, "task_type": "Development",
+         "description": "Benchmark entry", "billable_hours": hours, "billable_description": "Benchmark entry"}
+        for em_date in dates for project_id in project_ids
+    ]
+
+
+def range_em_details(project_ids: List[str], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """One date-range EM detail per project, splitting DAILY_HOURS evenly"""
+    hours = DAILY_HOURS // len(project_ids)
+    return [
+        {"start_date": start_date, "end_date": end_date, "project_id": project_id, "hours": hours,
+         "task_type": "Development", "description": "Benchmark range", "billable_hours": hours}
+        for project_id in project_ids
+    ]
@@ -0,0 +1,201 @@
+"""
+End-to-end benchmarks through FastAPI's TestClient against a seeded database.
+
+- process: the five-step fill_pending conversation on /process, timed per step,
+  with response sizes and the checkpoint bytes each conversation leaves behind
+- submit: the same submission sent as one /submit request
+- team_submit: one /submit/team request covering a team of users
+- load: concurrent five-step conversations of different users, swept over
+  several concurrency levels
+- setup: a check_pending run on the graph compiled once at startup against the
+  same run on a graph compiled per request, as /process did before
+
+Every run submits a fresh batch of pending dates, so repeats never collide.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+
+from benchmarks.data import em_details
+from benchmarks.nodes import pending_batches, selected_projects
+from benchmarks.timing import Stopwatch, measure, summarize
+
+PROCESS_STEPS = ["start", "select_projects", "select_dates", "fill_details", "approve"]
+
+
+def checkpoint_bytes() -> int:
+    from core.graph import checkpointer
+
+    return checkpointer.stats()["resident_bytes"] if hasattr(checkpointer, "stats") else 0
+
+
+def post(client: TestClient, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    response = client.post(path, json=body)
+    response.raise_for_status()
+    return response.json()
+
+
+def conversation(client: TestClient, user_id: str, project_ids: List[str], dates: List[str],
+                 stopwatch: Stopwatch, response_bytes: Optional[Dict[str, int]] = None) -> None:
+    """Walk one fill_pending conversation, recording each step's latency and, if asked, response size"""
+    steps = [
+        {"query": "fill_pending", "is_initial": True},
+        {"is_initial": False, "selected_projects": project_ids},
+        {"is_initial": False, "date_selection": {"date_selection_mode": "dates", "selected_dates": dates}},
+        {"is_initial": False, "em_details": em_details(project_ids, dates)},
+        {"is_initial": False, "approval_data": {"action": "approve"}},
+    ]
+
+    started = time.perf_counter()
+    for name, body in zip(PROCESS_STEPS, steps):
+        step_started = time.perf_counter()
+        response = client.post("/process", json={"user_id": user_id, **body})
+        stopwatch.add(name, (time.perf_counter() - step_started) * 1000)
+        if response_bytes is not None:
+            response_bytes[name] = len(response.content)
+        response.raise_for_status()
+    stopwatch.add("total", (time.perf_counter() - started) * 1000)
+
+    result = response.json()
+    if result["status"] != "completed" or not result["data"]["execution_result"]["success"]:
+        raise Exception(f"Conversation for {user_id} did not complete: {result}")
+
+
+def bench_process(client: TestClient, user_id: str, repeat: int) -> Dict[str, Any]:
+    project_ids = selected_projects(user_id)
+    warmup_dates, *batches = pending_batches(user_id, project_ids, repeat + 1)
+    conversation(client, user_id, project_ids, warmup_dates, Stopwatch())
+
+    stopwatch = Stopwatch()
+    response_bytes: Dict[str, int] = {}
+    checkpoint_growth = []
+    for dates in batches:
+        before = checkpoint_bytes()
+        conversation(client, user_id, project_ids, dates, stopwatch, response_bytes)
+        checkpoint_growth.append(checkpoint_bytes() - before)
+
+    return {
+        "steps": stopwatch.results(),
+        "response_bytes": response_bytes,
+        "checkpoint_bytes_per_conversation": max(checkpoint_growth, default=0),
+        "resident_checkpoint_bytes": checkpoint_bytes(),
+    }
+
+
+def bench_submit(client: TestClient, user_id: str, repeat: int) -> Dict[str, Any]:
+    project_ids = selected_projects(user_id)
+    batches = iter(pending_batches(user_id, project_ids, repeat + 1))
+
+    def submit(dates):
+        result = post(client, "/submit", {"user_id": user_id, "date_selection_mode": "dates",
+                                          "em_details": em_details(project_ids, dates)})
+        if result["status"] != "completed":
+            raise Exception(f"/submit for {user_id} did not complete: {result}")
+
+    return measure(submit, repeat, setup=lambda: next(batches))
+
+
+def bench_team_submit(client: TestClient, user_ids: List[str], repeat: int) -> Dict[str, Any]:
+    team = {user_id: selected_projects(user_id) for user_id in user_ids}
+    batches = {user_id: iter(pending_batches(user_id, project_ids, repeat + 1)) for user_id, project_ids in team.items()}
+
+    def team_body():
+        return {"submissions": [
+            {"user_id": user_id, "date_selection_mode": "dates",
+             "em_details": em_details(project_ids, next(batches[user_id]))}
+            for user_id, project_ids in team.items()
+        ]}
+
+    def submit(body):
+        result = post(client, "/submit/team", body)
+        if result["status"] != "completed":
+            raise Exception(f"/submit/team did not complete: {result['data']['results']}")
+
+    return {"team_size": len(user_ids), **measure(submit, repeat, setup=team_body)}
+
+
+def bench_load(client: TestClient, user_ids: List[str], repeat: int) -> Dict[str, Any]:
+    """len(user_ids) conversations at a time, repeat rounds"""
+    plans = {}
+    for user_id in user_ids:
+        project_ids = selected_projects(user_id)
+        plans[user_id] = (project_ids, pending_batches(user_id, project_ids, repeat))
+
+    stopwatch = Stopwatch()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as executor:
+        for round_index in range(repeat):
+            futures = [
+                executor.submit(conversation, client, user_id, project_ids, batches[round_index], stopwatch)
+                for user_id, (project_ids, batches) in plans.items()
+            ]
+            for future in futures:
+                future.result()
+
+    elapsed = time.perf_counter() - started
+    conversations = len(user_ids) * repeat
+
+    return {
+        "concurrency": len(user_ids),
+        "conversations": conversations,
+        "conversations_per_sec": round(conversations / elapsed, 2),
+        "requests_per_sec": round(conversations * len(PROCESS_STEPS) / elapsed, 2),
+        "conversation": summarize(stopwatch.samples["total"]),
+        "request": summarize([sample for name in PROCESS_STEPS for sample in stopwatch.samples[name]]),
+    }
+
+
+def bench_load_levels(client: TestClient, user_ids: List[str], levels: List[int], repeat: int) -> Dict[str, Any]:
+    """bench_load at each concurrency level, using the first level users; p99 should stay flat as it grows"""
+    return {"levels": [bench_load(client, user_ids[:level], repeat) for level in levels]}
+
+
+def bench_setup_overhead(user_id: str, repeat: int) -> Dict[str, Any]:
+    """
+        Per-request cost of compiling the workflow: the same check_pending run on the shared
+        graph and on a graph compiled for the request.
+    """
+    from core.graph import create_workflow
+    from core.state import EMState
+    from main import app
+
+    config = {"configurable": {"thread_id": user_id}}
+
+    def check_pending(workflow):
+        state = EMState(intent=None, user_id=user_id, query="check_pending", stage="")
+        return workflow.invoke(state, config=config)
+
+    shared = measure(lambda: check_pending(app.state.workflow), repeat)
+    per_request = measure(lambda: check_pending(create_workflow()), repeat)
+
+    return {
+        "shared_graph": shared,
+        "compiled_per_request": per_request,
+        "overhead_median_ms": round(per_request["median_ms"] - shared["median_ms"], 3),
+    }
+
+
+def run(users: Dict[str, Any], repeat: int, suites: List[str], concurrency_levels: List[int]) -> Dict[str, Any]:
+    """
+        users maps process, submit, team and load to the user ids each benchmark may write to,
+        and nodes to a user the read-only setup benchmark may use
+    """
+    from main import app
+
+    results = {}
+    with TestClient(app) as client:
+        if "process" in suites:
+            results["process"] = bench_process(client, users["process"], repeat)
+        if "submit" in suites:
+            results["submit"] = bench_submit(client, users["submit"], repeat)
+        if "team_submit" in suites:
+            results["team_submit"] = bench_team_submit(client, users["team"], repeat)
+        if "load" in suites:
+            results["load"] = bench_load_levels(client, users["load"], concurrency_levels, repeat)
+        if "setup" in suites:
+            results["setup"] = bench_setup_overhead(users["nodes"], repeat)
+
+    return results
@@ -0,0 +1,180 @@
+"""
+Benchmarks that need no database: workflow compilation, summary and submission
+validation against the per-entry loops they replaced, and response
+serialization and compression.
+"""
+import gzip
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from benchmarks.timing import measure
+from core.utils.submissions import build_submission_params
+from core.utils.summary import summary_entry
+from core.utils.validation import (DAILY_HOURS, MAX_ENTRY_HOURS, VALID_TASK_TYPES, submission_frame, submission_keys,
+                                   validate_submission_entries, validate_submission_targets, validate_summary)
+
+BENCH_USER_ID = "BU00000"
+PROJECT_METADATA = {
+    "project_name": "Bench Project", "project_code": "P-0001", "client_name": "Bench Client",
+}
+
+
+def summary_entries(count: int, projects_per_day: int = 2) -> List[Dict[str, Any]]:
+    """A valid expanded EM summary of count entries, projects_per_day entries per date"""
+    start_date = date(2025, 1, 6)
+    hours = DAILY_HOURS // projects_per_day
+
+    entries = []
+    for index in range(count):
+        entry = {"project_id": f"BP{index % projects_per_day:04d}", "hours": hours, "task_type": "Development",
+                 "description": "Synthetic work", "billable_hours": hours}
+        entry_date = (start_date + timedelta(days=index // projects_per_day)).isoformat()
+        entries.append({"date": entry_date, **summary_entry(entry, PROJECT_METADATA)})
+    return entries
+
+
+def legacy_validate_summary(expanded_entries: List[Dict[str, Any]]) -> List[str]:
+    """Per-date loop validate_summary replaced"""
+    validation_errors = []
+    entries_by_date = {}
+
+    for entry in expanded_entries:
+        entries_by_date.setdefault(entry["date"], []).append(entry)
+
+    for entry_date, entries in entries_by_date.items():
+        total_hours = sum(e["hours"] for e in entries)
+        if total_hours != DAILY_HOURS:
+            validation_errors.append(f"Total hours for {entry_date} exceed 24 hours ({total_hours}h)")
+
+        for entry in entries:
+            if entry["hours"] > MAX_ENTRY_HOURS:
+                validation_errors.append(f"Hours for {entry['project_name']} on {entry_date} cannot exceed {MAX_ENTRY_HOURS} hours")
+
+        project_ids = [e["project_id"] for e in entries]
+        if len(project_ids) != len(set(project_ids)):
+            validation_errors.append(f"Duplicate project entries found for {entry_date}")
+
+    return validation_errors
+
+
+def legacy_validate_submission(sql_params: Dict[str, List[Any]], user_id: str, assigned_projects: set,
+                               submission_status: Dict, today: date) -> List[str]:
+    """Per-entry loops validate_submission_entries and validate_submission_targets replaced"""
+    validation_errors = []
+    valid_dates = {}
+
+    for idx, (time_spend_hours, date_str, task_type) in enumerate(
+            zip(sql_params["time_spend_hours"], sql_params["em_date"], sql_params["task_type"])):
+        if not isinstance(time_spend_hours, (int, float)) or time_spend_hours < 0 or time_spend_hours > MAX_ENTRY_HOURS:
+            validation_errors.append(f"Invalid hours for entry {idx}: {time_spend_hours}")
+
+        try:
+            valid_dates[date_str] = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            validation_errors.append(f"Invalid date format: {date_str}")
+
+        if task_type not in VALID_TASK_TYPES:
+            validation_errors.append(f"Invalid task type: {task_type}")
+
+    for em_date, project_id in zip(sql_params["em_date"], sql_params["project_id"]):
+        if project_id not in assigned_projects:
+            validation_errors.append(f"Project {project_id} not assigned to user")
+
+        if em_date not in valid_dates:
+            continue
+
+        if valid_dates[em_date] > today:
+            validation_errors.append(f"Cannot submit EM for future date: {em_date}")
+
+        if submission_status.get((user_id, valid_dates[em_date].isoformat(), project_id)):
+            validation_errors.append(f"EM already submitted for {em_date}, {project_id}")
+
+    return validation_errors
+
+
+def columnar_validate_submission(sql_params: Dict[str, List[Any]], user_id: str, assigned_projects: set,
+                                 submitted_keys: List, today: date) -> List[str]:
+    frame = submission_frame(sql_params)
+    submission_keys(frame, user_id)
+    return validate_submission_entries(frame) + validate_submission_targets(
+        frame, user_id, assigned_projects, submitted_keys, today
+    )
+
+
+def bench_validation(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    results = {}
+    today = date.today()
+
+    for size in sizes:
+        entries = summary_entries(size)
+        sql_params = build_submission_params(entries)
+        assigned_projects = set(sql_params["project_id"])
+
+        assert legacy_validate_summary(entries) == validate_summary(entries)
+        assert legacy_validate_submission(sql_params, BENCH_USER_ID, assigned_projects, {}, today) == \
+            columnar_validate_submission(sql_params, BENCH_USER_ID, assigned_projects, [], today)
+
+        results[f"summary_{size}"] = {
+            "legacy": measure(lambda: legacy_validate_summary(entries), repeat),
+            "columnar": measure(lambda: validate_summary(entries), repeat),
+        }
+        results[f"submission_{size}"] = {
+            "legacy": measure(lambda: legacy_validate_submission(sql_params, BENCH_USER_ID, assigned_projects, {}, today),
+                              repeat),
+            "columnar": measure(lambda: columnar_validate_submission(sql_params, BENCH_USER_ID, assigned_projects, [],
+                                                                     today), repeat),
+        }
+
+    return results
+
+
+def bench_serialization(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    """The awaiting_approval payload rendered the old way (model + jsonable_encoder + json) and with orjson"""
+    from fastapi.encoders import jsonable_encoder
+
+    from common.responses import RESPONSE_GZIP_LEVEL, RESPONSE_ZSTD_LEVEL, zstandard
+    from main import EMResponse, em_response
+
+    results = {}
+    for size in sizes:
+        entries = summary_entries(size)
+        payload = {"status": "awaiting_approval", "em_summary": entries, "total_entries": len(entries),
+                   "validation_passed": True, "validation_errors": []}
+
+        def legacy_render():
+            return json.dumps(jsonable_encoder(EMResponse(status="awaiting_approval", data=payload,
+                                                          message="Review and approve EM entries"))).encode("utf-8")
+
+        def orjson_render():
+            return em_response(status="awaiting_approval", data=payload, message="Review and approve EM entries").body
+
+        body = orjson_render()
+        result = {
+            "body_bytes": len(body),
+            "legacy": measure(legacy_render, repeat),
+            "orjson": measure(orjson_render, repeat),
+            "gzip": {**measure(lambda: gzip.compress(body, RESPONSE_GZIP_LEVEL), repeat),
+                     "bytes": len(gzip.compress(body, RESPONSE_GZIP_LEVEL))},
+        }
+        if zstandard is not None:
+            compressor = zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL)
+            result["zstd"] = {**measure(lambda: compressor.compress(body), repeat),
+                              "bytes": len(compressor.compress(body))}
+        results[f"approval_payload_{size}"] = result
+
+    return results
+
+
+def bench_compile(repeat: int) -> Dict[str, Any]:
+    from core.graph import create_workflow
+
+    return measure(create_workflow, repeat)
+
+
+def run(validation_sizes: List[int], serialization_sizes: List[int], repeat: int) -> Dict[str, Any]:
+    return {
+        "compile_workflow": bench_compile(repeat),
+        "validation": bench_validation(validation_sizes, repeat),
+        "serialization": bench_serialization(serialization_sizes, repeat),
+    }
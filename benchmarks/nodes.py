@@ -0,0 +1,122 @@
+"""
+Per-node benchmarks of core/nodes.py against a seeded database.
+
+Each node is called directly, outside the graph. Its interrupt() calls are
+answered with canned resume values, as a resumed run would answer them. Nodes
+with a cache in front of the database are timed cold (caches cleared before each
+call) and warm.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+import core.nodes as nodes
+from benchmarks.data import clear_caches, em_details, range_em_details
+from benchmarks.timing import measure
+from core.utils.pending_dates import get_pending_dates
+from core.utils.projects import get_user_projects_page
+from core.utils.submissions import build_submission_params
+from core.utils.summary import build_summary_entries
+
+# Dates per submitted batch; every timed execute_sql_query_node call submits a fresh batch
+NODE_DATES = 5
+
+
+@contextmanager
+def resumed_with(*values: Any):
+    """Answer the interrupt() calls of core.nodes with values, in order"""
+    answers = iter(values)
+    original = nodes.interrupt
+    nodes.interrupt = lambda payload: next(answers)
+    try:
+        yield
+    finally:
+        nodes.interrupt = original
+
+
+def selected_projects(user_id: str) -> List[str]:
+    project_ids = [project["project_id"] for project in get_user_projects_page(user_id, 2)["projects"]]
+    if len(project_ids) < 2:
+        raise Exception(f"{user_id} has fewer than two assigned projects; reseed the benchmark data")
+    return project_ids
+
+
+def pending_batches(user_id: str, project_ids: List[str], count: int) -> List[List[str]]:
+    """count batches of NODE_DATES dates pending for all of the projects, oldest first"""
+    pending_dates = get_pending_dates(user_id, project_ids)
+    if len(pending_dates) < count * NODE_DATES:
+        raise Exception(f"{user_id} has {len(pending_dates)} pending dates, {count * NODE_DATES} needed; "
+                        f"raise BENCH_DAYS or lower BENCH_REPEAT")
+    return [pending_dates[index * NODE_DATES:(index + 1) * NODE_DATES] for index in range(count)]
+
+
+def run(user_id: str, repeat: int) -> Dict[str, Any]:
+    project_ids = selected_projects(user_id)
+    # One read-only batch for every node but execute, then one batch per execute call (plus warm-up)
+    sample_dates, *submit_batches = pending_batches(user_id, project_ids, repeat + 2)
+
+    base_state = {"user_id": user_id, "query": "fill_pending", "stage": ""}
+    selection_state = {**base_state, "selected_projects": project_ids, "date_selection_mode": "dates",
+                       "selected_dates": sample_dates}
+    date_selection = {"date_selection_mode": "dates", "selected_dates": sample_dates}
+    details = em_details(project_ids, sample_dates)
+    ranges = range_em_details(project_ids, sample_dates[0], sample_dates[-1])
+    approval = {"action": "approve"}
+
+    def call(node, state, *answers):
+        with resumed_with(*answers):
+            return node(dict(state))
+
+    summary_state = {**selection_state, "form_data": []}
+    em_summary = call(nodes.generate_summary_node, summary_state, details, approval)["em_summary"]
+    sql_state = call(nodes.generate_sql_query_node, {**base_state, "em_summary": em_summary})
+    validated_state = call(nodes.validate_sql_query_node, sql_state)
+    if not validated_state["validation_passed"]:
+        raise Exception(f"Benchmark submission failed validation: {validated_state['sql_validation_errors']}")
+
+    batches = iter(submit_batches)
+
+    def execute_state():
+        dates = next(batches)
+        sql_params = build_submission_params(build_summary_entries(user_id, em_details(project_ids, dates), "dates"))
+        return {**base_state, "sql_query": sql_state["sql_query"], "sql_params": sql_params, "validation_passed": True}
+
+    def cold(node, state, *answers):
+        return measure(lambda _: call(node, state, *answers), repeat, setup=clear_caches)
+
+    def warm(node, state, *answers):
+        return measure(lambda: call(node, state, *answers), repeat)
+
+    completed_state = {**base_state, "inserted_count": len(details),
+                       "execution_result": {"success": True, "inserted_count": len(details)}}
+
+    return {
+        "user_id": user_id,
+        "entries": len(details),
+        "intent_detection_node": warm(nodes.intent_detection_node, base_state),
+        "fetch_pending_dates_node": {
+            "cold": cold(nodes.fetch_pending_dates_node, base_state),
+            "warm": warm(nodes.fetch_pending_dates_node, base_state),
+        },
+        "fetch_user_projects_node": warm(nodes.fetch_user_projects_node, base_state, project_ids),
+        "prepare_date_selection_node": {
+            "cold": cold(nodes.prepare_date_selection_node, selection_state, date_selection),
+            "warm": warm(nodes.prepare_date_selection_node, selection_state, date_selection),
+        },
+        "generate_form_for_range_node": {
+            "cold": cold(nodes.generate_form_for_range_node, selection_state),
+            "warm": warm(nodes.generate_form_for_range_node, selection_state),
+        },
+        "generate_summary_node": {
+            "dates": warm(nodes.generate_summary_node, summary_state, details, approval),
+            "ranges": warm(nodes.generate_summary_node, {**summary_state, "date_selection_mode": "ranges"},
+                           ranges, approval),
+        },
+        "generate_sql_query_node": warm(nodes.generate_sql_query_node, {**base_state, "em_summary": em_summary}),
+        "validate_sql_query_node": {
+            "cold": cold(nodes.validate_sql_query_node, sql_state),
+            "warm": warm(nodes.validate_sql_query_node, sql_state),
+        },
+        "execute_sql_query_node": measure(lambda state: call(nodes.execute_sql_query_node, state), repeat,
+                                          setup=execute_state),
+        "generate_final_response_node": warm(nodes.generate_final_response_node, completed_state),
+    }
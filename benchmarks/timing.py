@@ -0,0 +1,65 @@
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, Any]:
+    """Count and distribution of timing samples, in milliseconds"""
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {"runs": 0}
+
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def measure(func: Callable[..., Any], repeat: int, warmup: int = 1,
+            setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """
+        Time repeat calls of func after warmup untimed calls. setup, when given, runs
+        untimed before every call and its result is passed to func.
+    """
+    def run_once() -> float:
+        argument = setup() if setup is not None else None
+        started = time.perf_counter()
+        if setup is not None:
+            func(argument)
+        else:
+            func()
+        return (time.perf_counter() - started) * 1000
+
+    for _ in range(warmup):
+        run_once()
+
+    return summarize([run_once() for _ in range(repeat)])
+
+
+class Stopwatch:
+    """Collects named samples from code that is timed inline"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.samples.setdefault(name, []).append(elapsed_ms)
+
+    def time(self, name: str, func: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = func()
+        self.add(name, (time.perf_counter() - started) * 1000)
+        return result
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        return {name: summarize(samples) for name, samples in self.samples.items()}
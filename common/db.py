@@ -1,11 +1,27 @@
 import mysql.connector
 import os
+import threading
+import time
+from contextlib import contextmanager
 from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool, CNX_POOL_MAXSIZE
+from mysql.connector.errors import PoolError
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 
+from common.log import logger
+
 load_dotenv()
 
+DB_POOL_NAME = os.getenv("DB_POOL_NAME", "em_pool")
+DB_POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "10")), CNX_POOL_MAXSIZE)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_RECONNECT_ATTEMPTS = int(os.getenv("DB_RECONNECT_ATTEMPTS", "3"))
+DB_RECONNECT_DELAY = int(os.getenv("DB_RECONNECT_DELAY", "1"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
 
 def parse_railway_url(database_url):
     """
@@ -23,17 +39,22 @@ def parse_railway_url(database_url):
     }
 
 
+def get_db_config():
+    """Read connection parameters from the DATABASE_URL environment variable"""
+    database_url = os.getenv("DATABASE_URL")
+
+    if not database_url:
+        raise Exception("DATABASE_URL not found in environment variables")
+
+    return parse_railway_url(database_url)
+
+
 def create_connection():
     """Create database connection from Railway URL"""
     try:
-        database_url = os.getenv("DATABASE_URL")
-
-        if not database_url:
-            raise Exception("DATABASE_URL not found in environment variables")
-
         print(f"Connecting to Railway database...")
 
-        db_config = parse_railway_url(database_url)
+        db_config = get_db_config()
 
         print(f"   Host: {db_config['host']}")
         print(f"   Port: {db_config['port']}")
@@ -55,5 +76,81 @@ def create_connection():
         print(f"Error connecting to MySQL: {e}")
         return None
 
-my_db = create_connection()
-cursor = my_db.cursor(dictionary=True)
\ No newline at end of file
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                db_config = get_db_config()
+                _pool = MySQLConnectionPool(
+                    pool_name=DB_POOL_NAME,
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    host=db_config['host'],
+                    port=db_config['port'],
+                    user=db_config['user'],
+                    password=db_config['password'],
+                    database=db_config['database']
+                )
+                logger.info(f"Created MySQL connection pool '{DB_POOL_NAME}' with {DB_POOL_SIZE} connections")
+
+    return _pool
+
+
+def _checkout_connection():
+    """Take a connection from the pool, waiting up to DB_POOL_TIMEOUT seconds when it is exhausted"""
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    delay = 0.01
+
+    while True:
+        try:
+            return get_pool().get_connection()
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise PoolError(f"No connection available in pool '{DB_POOL_NAME}' after {DB_POOL_TIMEOUT}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+
+@contextmanager
+def get_connection():
+    """
+    Check out a healthy pooled connection for the duration of the block.
+    The connection is pinged (and reconnected if the server dropped it) before use,
+    any open transaction is rolled back on error, and the connection is returned to the pool on exit.
+    """
+    connection = _checkout_connection()
+
+    try:
+        try:
+            connection.ping(reconnect=True, attempts=DB_RECONNECT_ATTEMPTS, delay=DB_RECONNECT_DELAY)
+        except Error as e:
+            logger.warning(f"Pooled connection health check failed, reconnecting: {e}")
+            connection.reconnect(attempts=DB_RECONNECT_ATTEMPTS, delay=DB_RECONNECT_DELAY)
+
+        yield connection
+
+    except Exception:
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            pass
+        raise
+
+    finally:
+        connection.close()
+
+
+@contextmanager
+def get_cursor(dictionary=True):
+    """Check out a pooled connection and a cursor on it; yields (connection, cursor)"""
+    with get_connection() as connection:
+        cursor = connection.cursor(dictionary=dictionary)
+        try:
+            yield connection, cursor
+        finally:
+            cursor.close()
@@ -1,12 +1,91 @@
+import hashlib
 import pandas as pd
 import os
+from datetime import date, datetime
 from mysql.connector import Error
 
+from common.schema import column_exists, index_exists
+from common.pending_stats import ensure_pending_stats_table, refresh_pending_stats
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# "append" inserts every row; rows already in em_data are rejected by uq_user_date_project,
+# so re-runs of an export must use "sync"
+IMPORT_MODE = os.getenv("IMPORT_MODE", "append").lower()
+
+EM_DATA_COLUMNS = (
+    "user_id", "user_name", "user_email", "user_role",
+    "em_date", "is_em_submitted",
+    "client_id", "client_name", "project_id", "project_name", "project_code", "is_project_assigned",
+    "task_for", "task_type",
+    "billing_type", "upwork_hours", "upwork_minutes",
+    "time_spend_hours", "time_spend_minutes",
+    "billable_hours", "billable_minutes", "billable_description",
+    "nonbillable_hours", "nonbillable_minutes", "nonbillable_description",
+    "qa_required", "qa_approved",
+    "task_incharge_id", "task_incharge_name", "meter_id", "meter_name",
+    "is_working_day", "is_holiday",
+)
+
+# MySQL error raised when InnoDB rolls back a transaction to resolve a deadlock
+DEADLOCK_ERRNO = 1213
+
+# Natural key of an em_data row and the positions of its parts in an import row
+NATURAL_KEY_COLUMNS = ("user_id", "em_date", "project_id")
+USER_ID_INDEX = EM_DATA_COLUMNS.index("user_id")
+EM_DATE_INDEX = EM_DATA_COLUMNS.index("em_date")
+PROJECT_ID_INDEX = EM_DATA_COLUMNS.index("project_id")
+
+# Keys added after the original schema. create_table includes them and
+# migrate_table adds whichever ones an existing table is missing.
+EM_DATA_INDEXES = [
+    ("uq_user_date_project", "UNIQUE KEY uq_user_date_project (user_id, em_date, project_id)"),
+    ("idx_user_assigned_project",
+     "INDEX idx_user_assigned_project (user_id, is_project_assigned, project_id, is_em_submitted, is_working_day, em_date)"),
+    ("idx_user_pending",
+     "INDEX idx_user_pending (user_id, is_em_submitted, is_working_day, em_date, project_id)"),
+    ("idx_user_project_assigned",
+     "INDEX idx_user_project_assigned (user_id, project_id, is_project_assigned)"),
+]
+
+INSERT_QUERY = """
+INSERT INTO em_data (
+    user_id, user_name, user_email, user_role,
+    em_date, is_em_submitted,
+    client_id, client_name, project_id, project_name, project_code, is_project_assigned,
+    task_for, task_type,
+    billing_type, upwork_hours, upwork_minutes,
+    time_spend_hours, time_spend_minutes,
+    billable_hours, billable_minutes, billable_description,
+    nonbillable_hours, nonbillable_minutes, nonbillable_description,
+    qa_required, qa_approved,
+    task_incharge_id, task_incharge_name, meter_id, meter_name,
+    is_working_day, is_holiday
+) VALUES (
+    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+)
+"""
+
+# Rows already submitted are never overwritten, and rows whose content hash is
+# unchanged are left untouched. row_hash and is_em_submitted are assigned last
+# because MySQL evaluates ON DUPLICATE KEY UPDATE assignments left to right.
+_UPDATABLE_COLUMNS = [c for c in EM_DATA_COLUMNS if c not in NATURAL_KEY_COLUMNS and c != "is_em_submitted"]
+UPSERT_QUERY = f"""
+INSERT INTO em_data ({", ".join(EM_DATA_COLUMNS)}, row_hash)
+VALUES ({", ".join(["%s"] * (len(EM_DATA_COLUMNS) + 1))})
+ON DUPLICATE KEY UPDATE
+    {", ".join(f"{c} = IF(is_em_submitted OR row_hash <=> VALUES(row_hash), {c}, VALUES({c}))"
+               for c in _UPDATABLE_COLUMNS)},
+    row_hash = IF(is_em_submitted, row_hash, VALUES(row_hash)),
+    is_em_submitted = is_em_submitted OR VALUES(is_em_submitted)
+"""
+
+
 def create_table(cursor):
     """Create the em_data table"""
     print("\nCreating table 'em_data'...")
 
-    create_table_query = """
+    create_table_query = f"""
     CREATE TABLE IF NOT EXISTS em_data (
         em_id INT AUTO_INCREMENT PRIMARY KEY,
 
@@ -49,12 +128,14 @@ def create_table(cursor):
 
         is_working_day BOOLEAN DEFAULT TRUE,
         is_holiday BOOLEAN DEFAULT FALSE,
+        row_hash CHAR(32),
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
         INDEX idx_user_date (user_id, em_date),
         INDEX idx_date (em_date),
-        INDEX idx_user_submitted (user_id, is_em_submitted)
+        INDEX idx_user_submitted (user_id, is_em_submitted),
+        {",\n        ".join(definition for _, definition in EM_DATA_INDEXES)}
     )
     """
 
@@ -65,114 +146,343 @@ def create_table(cursor):
         print(f"Error creating table: {e}")
 
 
-def import_excel_data(connection, cursor, excel_file_path):
-    """Import data from CSV file"""
-    print(f"\nReading Excel file: {excel_file_path}")
+def _report_duplicate_keys(cursor, limit=10):
+    """Print the (user_id, em_date, project_id) keys that block uq_user_date_project"""
+    cursor.execute("""
+        SELECT user_id, em_date, project_id, COUNT(*) AS copies
+        FROM em_data
+        GROUP BY user_id, em_date, project_id
+        HAVING COUNT(*) > 1
+        ORDER BY copies DESC
+        LIMIT %s
+    """, (limit,))
+    for row in cursor.fetchall():
+        print(f"   • {row['user_id']} {row['em_date']} {row['project_id']}: {row['copies']} rows")
+    print("Remove duplicate (user_id, em_date, project_id) rows before running an incremental sync")
+
+
+def migrate_table(cursor):
+    """Bring an existing em_data table up to the current schema"""
+    print("\nMigrating table 'em_data'...")
 
     try:
-        df = pd.read_excel(excel_file_path)
-        print(f"Read {len(df)} rows from Excel")
-
-        df = df.where(pd.notna(df), None)
-
-        insert_query = """
-        INSERT INTO em_data (
-            user_id, user_name, user_email, user_role,
-            em_date, is_em_submitted,
-            client_id, client_name, project_id, project_name, project_code, is_project_assigned,
-            task_for, task_type,
-            billing_type, upwork_hours, upwork_minutes,
-            time_spend_hours, time_spend_minutes,
-            billable_hours, billable_minutes, billable_description,
-            nonbillable_hours, nonbillable_minutes, nonbillable_description,
-            qa_required, qa_approved,
-            task_incharge_id, task_incharge_name, meter_id, meter_name,
-            is_working_day, is_holiday
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        )
-        """
-
-        print("Inserting data into database...")
-        inserted_count = 0
-
-        for index, row in df.iterrows():
-            try:
-                cursor.execute(insert_query, tuple(row))
-                inserted_count += 1
-
-                if (index + 1) % 10 == 0:
-                    print(f"   Inserted {index + 1} rows...")
-
-            except Error as e:
-                print(f"Error inserting row {index + 1}: {e}")
-                continue
+        if not column_exists(cursor, "row_hash"):
+            cursor.execute("ALTER TABLE em_data ADD COLUMN row_hash CHAR(32) NULL AFTER is_holiday")
+            print("   Added column row_hash")
+    except Error as e:
+        print(f"Error adding column row_hash: {e}")
+
+    # Non-unique indexes first so duplicate rows blocking the unique key do not hold them back
+    failed = False
+    for index_name, definition in sorted(EM_DATA_INDEXES, key=lambda index: index[1].startswith("UNIQUE")):
+        try:
+            if not index_exists(cursor, index_name):
+                cursor.execute(f"ALTER TABLE em_data ADD {definition}")
+                print(f"   Added index {index_name}")
+        except Error as e:
+            failed = True
+            print(f"Error adding index {index_name}: {e}")
+            if e.errno == 1062:
+                _report_duplicate_keys(cursor)
+
+    if not failed:
+        print("Table 'em_data' is up to date")
+
+
+def _pending_pairs(rows):
+    """(user_id, project_id) pairs of import rows, for recounting em_pending_stats"""
+    return ((row[USER_ID_INDEX], row[PROJECT_ID_INDEX]) for row in rows)
+
+
+def insert_batches(connection, cursor, batches):
+    """
+    Insert batches of row tuples with executemany, committing after every batch
+    together with the em_pending_stats recount of the batch's (user, project) pairs.
+    A batch that fails is rolled back and retried row by row so a single bad row
+    does not discard the rest of its batch. If the retry itself fails (a deadlock,
+    or the recount or commit failing) the batch is rolled back and recorded, and
+    none of its rows are counted as inserted.
+    Returns (inserted_count, errors) where errors lists failed batches and rows.
+    """
+    inserted_count = 0
+    errors = []
+    row_offset = 0
+
+    for batch_number, batch in enumerate(batches, start=1):
+        first_row, last_row = row_offset + 1, row_offset + len(batch)
+        row_offset += len(batch)
+
+        try:
+            cursor.executemany(INSERT_QUERY, batch)
+            refresh_pending_stats(cursor, _pending_pairs(batch))
+            connection.commit()
+            inserted_count += len(batch)
+            print(f"   Batch {batch_number}: inserted rows {first_row}-{last_row}")
+            continue
+
+        except Error as e:
+            connection.rollback()
+            print(f"Error inserting batch {batch_number} (rows {first_row}-{last_row}): {e}")
+            errors.append({"batch": batch_number, "rows": (first_row, last_row), "error": str(e), "errno": e.errno})
+
+        inserted_rows = []
+        try:
+            for index, row in enumerate(batch, start=first_row):
+                try:
+                    cursor.execute(INSERT_QUERY, row)
+                    inserted_rows.append(row)
+                except Error as e:
+                    # A deadlock rolls back the whole transaction, not just this row
+                    if e.errno == DEADLOCK_ERRNO:
+                        raise
+                    print(f"Error inserting row {index}: {e}")
+                    errors.append({"batch": batch_number, "row": index, "error": str(e), "errno": e.errno})
+            refresh_pending_stats(cursor, _pending_pairs(inserted_rows))
+            connection.commit()
+            inserted_count += len(inserted_rows)
+
+        except Error as e:
+            connection.rollback()
+            print(f"Error retrying batch {batch_number} (rows {first_row}-{last_row}) row by row: {e}")
+            errors.append({"batch": batch_number, "rows": (first_row, last_row), "error": str(e), "errno": e.errno})
+
+    return inserted_count, errors
+
+
+def chunk_rows(rows, batch_size):
+    """Group an iterable of rows into lists of at most batch_size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _frame_rows(df):
+    """Row tuples of a DataFrame chunk with NaN/NaT replaced by None"""
+    df = df.astype(object)
+    df = df.where(pd.notna(df), None)
+    return df.itertuples(index=False, name=None)
+
+
+def _fit_row(row):
+    """Pad or truncate a worksheet row to exactly one value per em_data column"""
+    width = len(EM_DATA_COLUMNS)
+    return tuple(row[:width]) + (None,) * (width - len(row))
+
+
+def iter_file_batches(file_path, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Stream rows from an xlsx, csv or parquet export in batches of batch_size tuples.
+    Only one batch is held in memory at a time, whatever the size of the file.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            # Exporters often declare a wrong sheet dimension, which sizes the rows
+            sheet.reset_dimensions()
+            rows = sheet.iter_rows(values_only=True)
+            next(rows, None)  # header
+            rows = (_fit_row(row) for row in rows if any(value is not None for value in row))
+            yield from chunk_rows(rows, batch_size)
+        finally:
+            workbook.close()
+
+    elif extension == ".csv":
+        for chunk in pd.read_csv(file_path, chunksize=batch_size):
+            yield list(_frame_rows(chunk))
+
+    elif extension == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required to import parquet files")
+
+        parquet_file = pq.ParquetFile(file_path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield list(_frame_rows(record_batch.to_pandas()))
+
+    else:
+        # Legacy formats (e.g. .xls) have no streaming reader
+        yield from chunk_rows(_frame_rows(pd.read_excel(file_path)), batch_size)
+
+
+def _normalize_value(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def row_hash(row):
+    """Content hash of a normalized import row"""
+    return hashlib.md5("\x1f".join("" if v is None else str(v) for v in row).encode("utf-8")).hexdigest()
+
+
+def _fetch_existing(cursor, keys):
+    """Existing (row_hash, is_em_submitted) for the given natural keys"""
+    placeholders = ','.join(['(%s, %s, %s)'] * len(keys))
+    cursor.execute(f"""
+        SELECT user_id, em_date, project_id, row_hash, is_em_submitted
+        FROM em_data
+        WHERE (user_id, em_date, project_id) IN ({placeholders})
+    """, [part for key in keys for part in key])
+
+    return {
+        (row['user_id'], row['em_date'].isoformat(), row['project_id']): row
+        for row in cursor.fetchall()
+    }
+
+
+def sync_batches(connection, cursor, batches):
+    """
+    Upsert batches of rows on the natural key (user_id, em_date, project_id).
+    Rows whose content hash matches the stored one, and rows already submitted,
+    are skipped; only new and changed rows are written. Each batch is committed.
+    Returns a dict of inserted/updated/unchanged/skipped_submitted/failed counts.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped_submitted": 0, "failed": 0}
+
+    for batch_number, batch in enumerate(batches, start=1):
+        rows_by_key = {}
+        for row in batch:
+            row = tuple(_normalize_value(v) for v in row)
+            key = (row[USER_ID_INDEX], row[EM_DATE_INDEX], row[PROJECT_ID_INDEX])
+            rows_by_key[key] = row + (row_hash(row),)
+
+        try:
+            existing = _fetch_existing(cursor, list(rows_by_key))
+
+            to_write = []
+            batch_counts = dict.fromkeys(counts, 0)
+            for key, row in rows_by_key.items():
+                current = existing.get(key)
+                if current is None:
+                    batch_counts["inserted"] += 1
+                elif current['is_em_submitted']:
+                    batch_counts["skipped_submitted"] += 1
+                    continue
+                elif current['row_hash'] == row[-1]:
+                    batch_counts["unchanged"] += 1
+                    continue
+                else:
+                    batch_counts["updated"] += 1
+                to_write.append(row)
+
+            if to_write:
+                cursor.executemany(UPSERT_QUERY, to_write)
+                refresh_pending_stats(cursor, _pending_pairs(to_write))
+            connection.commit()
+
+            # Counted only once the batch is committed, so a failed batch is reported once
+            for name, value in batch_counts.items():
+                counts[name] += value
+            print(f"   Batch {batch_number}: wrote {len(to_write)} of {len(rows_by_key)} rows")
+
+        except Error as e:
+            connection.rollback()
+            counts["failed"] += len(rows_by_key)
+            print(f"Error syncing batch {batch_number}: {e}")
+
+    return counts
+
+
+def sync_excel_data(connection, cursor, excel_file_path, batch_size=IMPORT_BATCH_SIZE):
+    """Incrementally sync an Excel, CSV or Parquet export into em_data"""
+    print(f"\nSyncing file: {excel_file_path}")
+
+    try:
+        counts = sync_batches(connection, cursor, iter_file_batches(excel_file_path, batch_size))
+
+        print(f"Inserted {counts['inserted']}, updated {counts['updated']}, unchanged {counts['unchanged']}, "
+              f"skipped (already submitted) {counts['skipped_submitted']}, failed {counts['failed']}")
+
+        return counts['inserted'] + counts['updated']
+
+    except FileNotFoundError:
+        print(f"File not found: {excel_file_path}")
+        return 0
+    except Exception as e:
+        print(f"Error syncing file: {e}")
+        return 0
+
+
+def import_excel_data(connection, cursor, excel_file_path, batch_size=IMPORT_BATCH_SIZE):
+    """Import data from an Excel, CSV or Parquet file"""
+    print(f"\nReading file: {excel_file_path}")
+
+    try:
+        print(f"Streaming rows into database in batches of {batch_size}...")
+        inserted_count, errors = insert_batches(connection, cursor, iter_file_batches(excel_file_path, batch_size))
 
-        connection.commit()
         print(f"Successfully inserted {inserted_count} rows")
+        if errors:
+            print(f"{len(errors)} batch/row errors while importing")
+            if any(error["errno"] == 1062 for error in errors):
+                print("Rows already present were rejected by uq_user_date_project; "
+                      "re-run the import with IMPORT_MODE=sync to update existing rows")
 
         return inserted_count
 
     except FileNotFoundError:
-        print(f"Excel file not found: {excel_file_path}")
+        print(f"File not found: {excel_file_path}")
         return 0
     except Exception as e:
-        print(f"Error importing Excel: {e}")
+        print(f"Error importing file: {e}")
         return 0
 
 
 def show_summary(cursor):
     """Show database summary"""
+    from core.utils.reports import fetch_pending_by_user, fetch_summary
+
     print("\n" + "=" * 60)
     print("DATABASE SUMMARY")
     print("=" * 60)
 
     try:
-        cursor.execute("SELECT COUNT(*) as total FROM em_data")
-        total = cursor.fetchone()['total']
-        cursor.fetchall()
-        print(f"Total Records: {total}")
-
-        cursor.execute("SELECT COUNT(DISTINCT user_id) as users FROM em_data")
-        users = cursor.fetchone()['users']
-        cursor.fetchall()
-        print(f"Total Users: {users}")
-
-        cursor.execute("SELECT COUNT(*) as submitted FROM em_data WHERE is_em_submitted = TRUE")
-        submitted = cursor.fetchone()['submitted']
-        cursor.fetchall()
-        cursor.execute("SELECT COUNT(*) as pending FROM em_data WHERE is_em_submitted = FALSE")
-        pending = cursor.fetchone()['pending']
-        cursor.fetchall()
-        print(f"Submitted EMs: {submitted}")
-        print(f"Pending EMs: {pending}")
+        summary = fetch_summary(cursor)
+        print(f"Total Records: {summary['total_records']}")
+        print(f"Total Users: {summary['total_users']}")
+        print(f"Submitted EMs: {summary['submitted']}")
+        print(f"Pending EMs: {summary['pending']}")
 
         print("\nPENDING DATES BY USER:")
         print("-" * 60)
 
-        cursor.execute("""
-            SELECT user_id, user_name, COUNT(*) as pending_count
-            FROM em_data
-            WHERE is_em_submitted = FALSE
-            GROUP BY user_id, user_name
-            ORDER BY pending_count DESC
-        """)
+        sample_user = None
+        page = {"next_after": ""}
+        while page["next_after"] is not None:
+            page = fetch_pending_by_user(cursor, after=page["next_after"])
+            for user in page["users"]:
+                sample_user = sample_user or user
+                print(f"   {user['user_name']} ({user['user_id']}): {user['pending_count']} pending days")
 
-        for row in cursor.fetchall():
-            print(f"   {row['user_name']} ({row['user_id']}): {row['pending_count']} pending days")
+        if sample_user is None:
+            return
 
-        print("\nSample Pending Dates for USR001:")
+        print(f"\nSample Pending Dates for {sample_user['user_id']}:")
         print("-" * 60)
 
         cursor.execute("""
             SELECT em_date, project_name
             FROM em_data
-            WHERE user_id = 'USR001'
+            WHERE user_id = %s
             AND is_em_submitted = FALSE
             ORDER BY em_date ASC
             LIMIT 5
-        """)
+        """, (sample_user['user_id'],))
 
         for row in cursor.fetchall():
             print(f"   • {row['em_date']} - {row['project_name']}")
@@ -195,9 +505,16 @@ def main():
         cursor = connection.cursor(dictionary=True)
 
         create_table(cursor)
+        migrate_table(cursor)
+        if ensure_pending_stats_table(cursor):
+            print("\nCreated em_pending_stats from existing rows")
+        connection.commit()
 
         excel_file =os.getenv("EXCEL_PATH")
-        inserted = import_excel_data(connection, cursor, excel_file)
+        if IMPORT_MODE == "sync":
+            inserted = sync_excel_data(connection, cursor, excel_file)
+        else:
+            inserted = import_excel_data(connection, cursor, excel_file)
 
         if inserted > 0:
             show_summary(cursor)
@@ -0,0 +1,162 @@
+"""
+Per-(user, project) pending-EM counters kept next to em_data: the em_pending_stats
+table and the write-side maintenance shared by the importer and EM submission.
+
+Every write path that can change a row's pending status recounts the
+(user_id, project_id) pairs it touched inside its own transaction, so
+em_pending_stats stays in step with em_data. core/utils/pending_stats.py reads
+the counters and reconciles drift from manual edits.
+"""
+import threading
+from typing import Dict, Iterable, Tuple
+
+from common.schema import column_exists, table_exists
+
+PENDING_STATS_PAIR_CHUNK_SIZE = 1000
+
+PendingPair = Tuple[str, str]
+
+CREATE_PENDING_STATS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS em_pending_stats (
+        user_id VARCHAR(50) NOT NULL,
+        project_id VARCHAR(50) NOT NULL,
+        pending_count INT NOT NULL DEFAULT 0,
+        pending_working_days INT NOT NULL DEFAULT 0,
+        revision INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, project_id)
+    )
+"""
+
+PENDING_COUNTS_SELECT = """
+    SELECT user_id, project_id,
+           COALESCE(SUM(is_em_submitted = FALSE), 0) AS pending_count,
+           COALESCE(SUM(is_em_submitted = FALSE AND is_working_day = TRUE), 0) AS pending_working_days
+    FROM em_data
+"""
+
+UPSERT_PENDING_STATS_QUERY = """
+    INSERT INTO em_pending_stats (user_id, project_id, pending_count, pending_working_days)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        pending_count = VALUES(pending_count),
+        pending_working_days = VALUES(pending_working_days),
+        revision = revision + 1
+"""
+
+# Fills a newly created table from em_data. ON DUPLICATE KEY makes it safe when another
+# process creates and backfills the table at the same time.
+BACKFILL_PENDING_STATS_QUERY = f"""
+    INSERT INTO em_pending_stats (user_id, project_id, pending_count, pending_working_days)
+    SELECT counts.user_id, counts.project_id, counts.pending_count, counts.pending_working_days
+    FROM ({PENDING_COUNTS_SELECT} GROUP BY user_id, project_id) counts
+    ON DUPLICATE KEY UPDATE
+        pending_count = counts.pending_count,
+        pending_working_days = counts.pending_working_days,
+        revision = revision + 1
+"""
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def ensure_pending_stats_table(cursor) -> bool:
+    """
+        Create em_pending_stats once per process and backfill it from em_data, so the
+        counters are complete from the start: a user with no counter row has no em_data
+        rows. Must run outside a transaction, since DDL commits implicitly; the caller
+        commits the backfill. Returns True when the table was created by this call.
+    """
+    global _table_ready
+
+    if _table_ready:
+        return False
+
+    with _table_lock:
+        if _table_ready:
+            return False
+        created = not table_exists(cursor, "em_pending_stats")
+        if created:
+            cursor.execute(CREATE_PENDING_STATS_TABLE_QUERY)
+            cursor.execute(BACKFILL_PENDING_STATS_QUERY)
+        elif not column_exists(cursor, "revision", "em_pending_stats"):
+            cursor.execute("ALTER TABLE em_pending_stats ADD COLUMN revision INT NOT NULL DEFAULT 0 AFTER pending_working_days")
+        _table_ready = True
+
+    return created
+
+
+def refresh_pending_stats(cursor, pairs: Iterable[PendingPair]) -> None:
+    """
+        Recount the given (user_id, project_id) pairs from em_data into em_pending_stats,
+        and delete the counters of pairs that no longer have any em_data rows.
+        Run it in the transaction that changed those rows, before committing.
+    """
+    pairs = list(dict.fromkeys(pairs))
+
+    for start in range(0, len(pairs), PENDING_STATS_PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PENDING_STATS_PAIR_CHUNK_SIZE]
+        placeholders = ','.join(['(%s, %s)'] * len(chunk))
+
+        cursor.execute(f"""
+            INSERT INTO em_pending_stats (user_id, project_id, pending_count, pending_working_days)
+            SELECT counts.user_id, counts.project_id, counts.pending_count, counts.pending_working_days
+            FROM ({PENDING_COUNTS_SELECT}
+                WHERE (user_id, project_id) IN ({placeholders})
+                GROUP BY user_id, project_id
+            ) counts
+            ON DUPLICATE KEY UPDATE
+                pending_count = counts.pending_count,
+                pending_working_days = counts.pending_working_days,
+                revision = revision + 1
+        """, [part for pair in chunk for part in pair])
+
+        # The GROUP BY above yields nothing for a pair without rows, so its old counters
+        # would otherwise survive and still be trusted by get_pending_dates
+        cursor.execute(f"""
+            DELETE FROM em_pending_stats
+            WHERE (user_id, project_id) IN ({placeholders})
+            AND NOT EXISTS (
+                SELECT 1 FROM em_data
+                WHERE em_data.user_id = em_pending_stats.user_id
+                AND em_data.project_id = em_pending_stats.project_id
+            )
+        """, [part for pair in chunk for part in pair])
+
+
+def rebuild_pending_stats(connection, cursor) -> Dict[str, int]:
+    """
+        Recompute every counter from em_data and fix the rows that drifted, in one
+        transaction. Returns how many pairs were checked, corrected and removed.
+    """
+    connection.start_transaction()
+    try:
+        # Lock the counters before the first consistent read, which fixes the em_data
+        # snapshot. Writers recount inside their own transaction, so one that commits
+        # before the lock is in the snapshot and one that has not waits for this rebuild.
+        cursor.execute("SELECT user_id, project_id, pending_count, pending_working_days FROM em_pending_stats FOR UPDATE")
+        stored = {
+            (row["user_id"], row["project_id"]): (row["pending_count"], row["pending_working_days"])
+            for row in cursor.fetchall()
+        }
+
+        cursor.execute(f"{PENDING_COUNTS_SELECT} GROUP BY user_id, project_id")
+        actual = {
+            (row["user_id"], row["project_id"]): (int(row["pending_count"]), int(row["pending_working_days"]))
+            for row in cursor.fetchall()
+        }
+
+        corrected = [pair + counts for pair, counts in actual.items() if stored.get(pair) != counts]
+        removed = [pair for pair in stored if pair not in actual]
+
+        if corrected:
+            cursor.executemany(UPSERT_PENDING_STATS_QUERY, corrected)
+        if removed:
+            cursor.executemany("DELETE FROM em_pending_stats WHERE user_id = %s AND project_id = %s", removed)
+        connection.commit()
+
+    except Exception:
+        connection.rollback()
+        raise
+
+    return {"checked": len(actual), "corrected": len(corrected), "removed": len(removed)}
@@ -0,0 +1,160 @@
+"""
+Query-plan regression check for the workflow queries against em_data.
+
+Runs EXPLAIN on every statement the workflow issues and fails when a plan
+falls back to a full table scan, a full index scan or a filesort. Run it against
+a seeded database after migrating the schema:
+
+    python -m common.query_plans
+
+Plans depend on table statistics, so seed realistically sized data first; on a
+near-empty table MySQL may legitimately prefer a full scan.
+"""
+import sys
+
+from common.db import get_cursor
+from common.import_em_data import EM_DATA_INDEXES
+from common.schema import index_exists
+
+# Tables whose full scan is intended: the staged submission chunk is always read in full
+SCAN_ALLOWED_TABLES = {"s", "em_submission_stage"}
+
+# Queries that aggregate every em_data row, where a covering full index scan is the best plan
+INDEX_SCAN_ALLOWED_QUERIES = {"report_summary"}
+
+MIN_SEEDED_ROWS = 10000
+
+
+def _sample_params(cursor):
+    """Pick a user, project and pending date that exist in em_data"""
+    cursor.execute("""
+        SELECT user_id, project_id, em_date FROM em_data
+        WHERE is_em_submitted = FALSE AND is_working_day = TRUE AND is_project_assigned = TRUE
+        LIMIT 1
+    """)
+    return cursor.fetchone()
+
+
+def workflow_queries(sample):
+    """(name, sql, params) for every workflow query, built from the code that issues it"""
+    from core.utils.pending_dates import (PENDING_DATES_PAGE_QUERY, PENDING_DATES_QUERY, PENDING_DAYS_IN_RANGE_QUERY,
+                                          PROJECT_PENDING_DATES_QUERY, TEAM_PENDING_DAYS_IN_RANGE_QUERY)
+    from core.utils.pending_stats import USER_PENDING_STATS_QUERY, USER_PENDING_SUMMARY_QUERY
+    from core.utils.projects import (USER_PROJECTS_PAGE_QUERY, USER_PROJECTS_QUERY, assigned_projects_query,
+                                     project_metadata_query, team_project_metadata_query)
+    from core.utils.reports import PENDING_BY_USER_QUERY, SUMMARY_QUERY
+    from core.utils.submissions import STAGE_MATCH_QUERY, STAGE_UPDATE_QUERY, submission_status_query
+
+    user_id, project_id = sample["user_id"], sample["project_id"]
+    em_date = sample["em_date"].strftime("%Y-%m-%d")
+
+    return [
+        ("fetch_pending_dates", PENDING_DATES_QUERY, (user_id, False, True)),
+        ("user_pending_stats", USER_PENDING_STATS_QUERY, (user_id,)),
+        ("user_pending_summary", USER_PENDING_SUMMARY_QUERY, (user_id,)),
+        ("pending_dates_page", PENDING_DATES_PAGE_QUERY.format(project_filter=""),
+         (user_id, False, True, "1000-01-01", 100)),
+        ("fetch_user_projects", USER_PROJECTS_QUERY, (user_id, True)),
+        ("user_projects_page", USER_PROJECTS_PAGE_QUERY, (user_id, True, "", 100)),
+        ("prepare_date_selection",
+         PROJECT_PENDING_DATES_QUERY.format(project_placeholders="%s, %s"),
+         (user_id, False, True, project_id, project_id)),
+        ("pending_days_in_range", PENDING_DAYS_IN_RANGE_QUERY.format(project_placeholders="%s, %s"),
+         (user_id, False, True, em_date, em_date, project_id, project_id)),
+        ("team_pending_days_in_range", TEAM_PENDING_DAYS_IN_RANGE_QUERY.format(pair_placeholders="(%s, %s), (%s, %s)"),
+         (user_id, project_id, user_id, project_id, False, True, em_date, em_date)),
+        ("project_metadata", project_metadata_query(2), (user_id, project_id, project_id)),
+        ("team_project_metadata", team_project_metadata_query(2), (user_id, project_id, user_id, project_id)),
+        ("assigned_projects", assigned_projects_query(2), (user_id, project_id, user_id, project_id)),
+        ("submission_status", submission_status_query(2),
+         (user_id, em_date, project_id, user_id, em_date, project_id)),
+        ("stage_match", STAGE_MATCH_QUERY, ()),
+        ("stage_update", STAGE_UPDATE_QUERY, ()),
+        ("report_pending_by_user", PENDING_BY_USER_QUERY, ("", 50)),
+        ("report_summary", SUMMARY_QUERY, ()),
+    ]
+
+
+def plan_problems(plan_rows, allow_index_scan=False):
+    """Describe each full scan or filesort in the rows of a traditional EXPLAIN"""
+    problems = []
+
+    for row in plan_rows:
+        table = row.get("table") or ""
+        extra = row.get("Extra") or ""
+
+        if table.startswith("<") or table in SCAN_ALLOWED_TABLES:
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"full table scan on {table}")
+        elif row.get("type") == "index" and not allow_index_scan:
+            problems.append(f"full index scan on {table} ({row.get('key')})")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table}")
+
+    return problems
+
+
+def check_query_plans(cursor):
+    """EXPLAIN every workflow query; returns {query name: [problems]} for the failing ones"""
+    from core.utils.submissions import CREATE_STAGE_TABLE_QUERY
+
+    sample = _sample_params(cursor)
+    if sample is None:
+        raise Exception("em_data has no pending assigned rows to sample query parameters from")
+
+    cursor.execute(CREATE_STAGE_TABLE_QUERY)
+    cursor.execute(
+        "INSERT IGNORE INTO em_submission_stage (user_id, em_date, project_id) VALUES (%s, %s, %s)",
+        (sample["user_id"], sample["em_date"], sample["project_id"])
+    )
+
+    failures = {}
+    try:
+        for name, query, params in workflow_queries(sample):
+            cursor.execute(f"EXPLAIN {query}", params)
+            plan_rows = cursor.fetchall()
+
+            for row in plan_rows:
+                print(f"   {name:<24} {row.get('table') or '-':<22} type={row.get('type')} "
+                      f"key={row.get('key')} extra={row.get('Extra') or ''}")
+
+            problems = plan_problems(plan_rows, allow_index_scan=name in INDEX_SCAN_ALLOWED_QUERIES)
+            if problems:
+                failures[name] = problems
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS em_submission_stage")
+
+    return failures
+
+
+def main():
+    with get_cursor() as (connection, cursor):
+        cursor.execute("SELECT COUNT(*) AS count FROM em_data")
+        row_count = cursor.fetchone()["count"]
+        if row_count < MIN_SEEDED_ROWS:
+            print(f"Warning: em_data has only {row_count} rows; plans may not reflect production")
+
+        missing = [name for name, _ in EM_DATA_INDEXES if not index_exists(cursor, name)]
+        if missing:
+            print(f"Missing indexes {', '.join(missing)}; run the importer migration first")
+            sys.exit(1)
+
+        cursor.execute("ANALYZE TABLE em_data")
+        cursor.fetchall()
+
+        print("\nQuery plans:")
+        failures = check_query_plans(cursor)
+        connection.commit()
+
+    if failures:
+        print("\nQUERY PLAN REGRESSIONS:")
+        for name, problems in failures.items():
+            print(f"   {name}: {'; '.join(problems)}")
+        sys.exit(1)
+
+    print("\nAll workflow queries use indexed access paths")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encodings offered to clients, in order of preference; empty disables compression
+RESPONSE_COMPRESSION = [encoding.strip() for encoding in os.getenv("RESPONSE_COMPRESSION", "zstd,gzip").split(",")
+                        if encoding.strip()]
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+
+
+def _orjson_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content with orjson; dates and datetimes from MySQL rows serialize natively"""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Quality value of each coding in an Accept-Encoding header, e.g. {"gzip": 1.0, "zstd": 0.0}"""
+    qualities = {}
+    for part in header.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def choose_encoding(header: str, encodings) -> Optional[str]:
+    """The first of encodings the client accepts with a non-zero quality; "*" covers unnamed codings"""
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    return next((encoding for encoding in encodings if qualities.get(encoding, wildcard) > 0), None)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson; dates and datetimes from MySQL rows serialize natively"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int = RESPONSE_ZSTD_LEVEL) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Streamed chunks are flushed as blocks so NDJSON lines reach the client as they are produced
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK if more_body else zstandard.COMPRESSOBJ_FLUSH_FINISH
+        return self.compressor.compress(body) + self.compressor.flush(flush_mode)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+        Compress responses of at least minimum_size bytes with the first encoding from
+        RESPONSE_COMPRESSION that the client accepts. zstd needs the zstandard package.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE,
+                 compresslevel: int = RESPONSE_GZIP_LEVEL) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.encodings = [encoding for encoding in RESPONSE_COMPRESSION
+                          if encoding == "gzip" or (encoding == "zstd" and zstandard is not None)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""), self.encodings)
+
+        if encoding == "zstd":
+            responder = ZstdResponder(self.app, self.minimum_size)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
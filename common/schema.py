@@ -0,0 +1,25 @@
+"""information_schema lookups shared by the importer, the stats table setup and the query-plan check"""
+
+
+def table_exists(cursor, table_name):
+    cursor.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    return cursor.fetchone()['count'] > 0
+
+
+def column_exists(cursor, column_name, table_name="em_data"):
+    cursor.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table_name, column_name))
+    return cursor.fetchone()['count'] > 0
+
+
+def index_exists(cursor, index_name, table_name="em_data"):
+    cursor.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table_name, index_name))
+    return cursor.fetchone()['count'] > 0
@@ -0,0 +1,500 @@
+import abc
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata,
+                                       CheckpointTuple, WRITES_IDX_MAP, get_checkpoint_id, get_checkpoint_metadata)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from common.log import logger
+
+CHECKPOINTER_BACKEND = os.getenv("CHECKPOINTER_BACKEND", "memory").lower()
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "em_checkpoints.sqlite")
+CHECKPOINT_MAX_SESSIONS = int(os.getenv("CHECKPOINT_MAX_SESSIONS", "1000"))
+CHECKPOINT_IDLE_TTL = float(os.getenv("CHECKPOINT_IDLE_TTL", "3600"))
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+        In-memory checkpointer that forgets abandoned EM sessions.
+
+        A thread that has not been read or written for idle_ttl seconds is dropped, and
+        when more than max_sessions threads are resident the least recently used ones are
+        evicted. Resuming an evicted thread finds no checkpoint, which /process reports
+        as an expired session.
+    """
+
+    def __init__(self, max_sessions: int = CHECKPOINT_MAX_SESSIONS, idle_ttl: float = CHECKPOINT_IDLE_TTL, *,
+                 serde=None):
+        super().__init__(serde=serde)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evicted_sessions = 0
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _touch(self, thread_id: str) -> None:
+        with self._lock:
+            self._last_access[thread_id] = time.monotonic()
+            self._last_access.move_to_end(thread_id)
+
+    def _is_expired(self, thread_id: str) -> bool:
+        last_access = self._last_access.get(thread_id)
+        return last_access is not None and time.monotonic() - last_access > self.idle_ttl
+
+    def _evict(self, thread_id: str) -> None:
+        self._last_access.pop(thread_id, None)
+        super().delete_thread(thread_id)
+        self.evicted_sessions += 1
+        logger.info(f"Evicted checkpoint session {thread_id}")
+
+    def evict_expired(self) -> None:
+        """Drop idle sessions and enforce the max_sessions bound"""
+        with self._lock:
+            while self._last_access:
+                thread_id, last_access = next(iter(self._last_access.items()))
+                if time.monotonic() - last_access <= self.idle_ttl and len(self._last_access) <= self.max_sessions:
+                    break
+                self._evict(thread_id)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+
+        with self._lock:
+            if self._is_expired(thread_id):
+                self._evict(thread_id)
+                return None
+            if thread_id not in self._last_access:
+                return None
+            self._touch(thread_id)
+
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        self._touch(config["configurable"]["thread_id"])
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.evict_expired()
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path="") -> None:
+        self._touch(config["configurable"]["thread_id"])
+        super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._last_access.pop(thread_id, None)
+            super().delete_thread(thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        """Resident session count and approximate serialized size of everything held in memory"""
+        with self._lock:
+            resident_bytes = 0
+            for namespaces in list(self.storage.values()):
+                for checkpoints in list(namespaces.values()):
+                    for checkpoint_b, metadata_b, _ in list(checkpoints.values()):
+                        resident_bytes += len(checkpoint_b[1]) + len(metadata_b[1])
+            for _, value in list(self.blobs.items()):
+                resident_bytes += len(value[1])
+            for writes in list(self.writes.values()):
+                for _, _, value, _ in list(writes.values()):
+                    resident_bytes += len(value[1])
+
+            return {
+                "backend": "memory",
+                "resident_sessions": len(self._last_access),
+                "resident_bytes": resident_bytes,
+                "evicted_sessions": self.evicted_sessions,
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl,
+            }
+
+
+class SQLCheckpointSaver(BaseCheckpointSaver[str], abc.ABC):
+    """
+        Checkpoint saver that persists LangGraph checkpoints in a SQL database so that
+        interrupted EM workflows can be resumed from any worker process or after a restart.
+
+        Checkpoints, per-channel values and pending writes are stored in separate tables,
+        the same layout InMemorySaver uses: a channel value is written only when its
+        version changes. All values are stored as msgpack via the saver's serializer.
+    """
+
+    placeholder = "%s"
+    insert_ignore = "INSERT IGNORE"
+    blob_type = "LONGBLOB"
+
+    def __init__(self, *, serde=None):
+        super().__init__(serde=serde)
+        self._setup_done = False
+        self._setup_lock = threading.Lock()
+
+    @abc.abstractmethod
+    @contextmanager
+    def _cursor(self):
+        """Yield a cursor inside a transaction that is committed on exit"""
+
+    def _sql(self, query: str) -> str:
+        return query.replace("%s", self.placeholder)
+
+    def setup(self) -> None:
+        """Create the checkpoint tables if they do not exist yet"""
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS em_checkpoints (
+                    thread_id VARCHAR(150) NOT NULL,
+                    checkpoint_ns VARCHAR(150) NOT NULL DEFAULT '',
+                    checkpoint_id VARCHAR(64) NOT NULL,
+                    parent_checkpoint_id VARCHAR(64),
+                    type VARCHAR(32),
+                    checkpoint {self.blob_type} NOT NULL,
+                    metadata_type VARCHAR(32),
+                    metadata {self.blob_type} NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS em_checkpoint_blobs (
+                    thread_id VARCHAR(150) NOT NULL,
+                    checkpoint_ns VARCHAR(150) NOT NULL DEFAULT '',
+                    channel VARCHAR(150) NOT NULL,
+                    version VARCHAR(64) NOT NULL,
+                    type VARCHAR(32) NOT NULL,
+                    blob_value {self.blob_type},
+                    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS em_checkpoint_writes (
+                    thread_id VARCHAR(150) NOT NULL,
+                    checkpoint_ns VARCHAR(150) NOT NULL DEFAULT '',
+                    checkpoint_id VARCHAR(64) NOT NULL,
+                    task_id VARCHAR(64) NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel VARCHAR(150) NOT NULL,
+                    type VARCHAR(32),
+                    blob_value {self.blob_type} NOT NULL,
+                    task_path VARCHAR(255) NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                )
+            """)
+
+    def _ensure_setup(self) -> None:
+        if self._setup_done:
+            return
+        with self._setup_lock:
+            if not self._setup_done:
+                self.setup()
+                self._setup_done = True
+
+    def _load_blobs(self, cursor, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        if not versions:
+            return {}
+
+        pairs = ','.join(['(%s, %s)'] * len(versions))
+        params = [thread_id, checkpoint_ns]
+        for channel, version in versions.items():
+            params.extend([channel, str(version)])
+
+        cursor.execute(self._sql(f"""
+            SELECT channel, type, blob_value FROM em_checkpoint_blobs
+            WHERE thread_id = %s AND checkpoint_ns = %s AND (channel, version) IN ({pairs})
+        """), params)
+
+        channel_values = {}
+        for channel, type_, value in cursor.fetchall():
+            if type_ != "empty":
+                channel_values[channel] = self.serde.loads_typed((type_, bytes(value)))
+        return channel_values
+
+    def _load_writes(self, cursor, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        cursor.execute(self._sql("""
+            SELECT task_id, channel, type, blob_value FROM em_checkpoint_writes
+            WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
+            ORDER BY task_id, idx
+        """), (thread_id, checkpoint_ns, checkpoint_id))
+        return [(task_id, channel, self.serde.loads_typed((type_, bytes(value))))
+                for task_id, channel, type_, value in cursor.fetchall()]
+
+    def _build_tuple(self, cursor, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint = self.serde.loads_typed((type_, bytes(checkpoint_b)))
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(cursor, thread_id, checkpoint_ns,
+                                                   checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, bytes(metadata_b))),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._load_writes(cursor, thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self._ensure_setup()
+
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        with self._cursor() as cursor:
+            if checkpoint_id := get_checkpoint_id(config):
+                cursor.execute(self._sql("""
+                    SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                    FROM em_checkpoints
+                    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
+                """), (thread_id, checkpoint_ns, checkpoint_id))
+            else:
+                cursor.execute(self._sql("""
+                    SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                    FROM em_checkpoints
+                    WHERE thread_id = %s AND checkpoint_ns = %s
+                    ORDER BY checkpoint_id DESC
+                    LIMIT 1
+                """), (thread_id, checkpoint_ns))
+
+            row = cursor.fetchone()
+            cursor.fetchall()
+            if row is None:
+                return None
+
+            return self._build_tuple(cursor, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        self._ensure_setup()
+
+        conditions = []
+        params = []
+        if config:
+            conditions.append("thread_id = %s")
+            params.append(str(config["configurable"]["thread_id"]))
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = %s")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = %s")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < %s")
+            params.append(before_checkpoint_id)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._cursor() as cursor:
+            cursor.execute(self._sql(f"""
+                SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,
+                       metadata_type, metadata
+                FROM em_checkpoints
+                {where}
+                ORDER BY checkpoint_id DESC
+            """), params)
+            rows = cursor.fetchall()
+
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if filter:
+                    metadata = self.serde.loads_typed((row[4], bytes(row[5])))
+                    if not all(value == metadata.get(key) for key, value in filter.items()):
+                        continue
+                if limit is not None and len(results) >= limit:
+                    break
+                results.append(self._build_tuple(cursor, thread_id, checkpoint_ns, row))
+
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._ensure_setup()
+
+        c = checkpoint.copy()
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: dict[str, Any] = c.pop("channel_values")
+
+        blob_rows = []
+        for channel, version in new_versions.items():
+            type_, value = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            blob_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, value))
+
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._cursor() as cursor:
+            if blob_rows:
+                cursor.executemany(self._sql("""
+                    REPLACE INTO em_checkpoint_blobs (thread_id, checkpoint_ns, channel, version, type, blob_value)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """), blob_rows)
+            cursor.execute(self._sql("""
+                REPLACE INTO em_checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,
+                     metadata_type, metadata)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """), (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                   type_, checkpoint_b, metadata_type, metadata_b))
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._ensure_setup()
+
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Special writes (errors, interrupts, resumes) replace earlier ones; regular writes keep the first value.
+        verb = "REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else self.insert_ignore
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+
+        with self._cursor() as cursor:
+            cursor.executemany(self._sql(f"""
+                {verb} INTO em_checkpoint_writes
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob_value, task_path)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """), rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._ensure_setup()
+
+        with self._cursor() as cursor:
+            for table in ("em_checkpoints", "em_checkpoint_blobs", "em_checkpoint_writes"):
+                cursor.execute(self._sql(f"DELETE FROM {table} WHERE thread_id = %s"), (str(thread_id),))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+
+class SQLiteCheckpointSaver(SQLCheckpointSaver):
+    """
+        Checkpoint saver backed by a local SQLite file. WAL mode lets several worker
+        processes on the same host share one file.
+    """
+
+    placeholder = "?"
+    insert_ignore = "INSERT OR IGNORE"
+    blob_type = "BLOB"
+
+    def __init__(self, path: str = CHECKPOINT_SQLITE_PATH, *, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+
+    @contextmanager
+    def _cursor(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            cursor = connection.cursor()
+            yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+
+class MySQLCheckpointSaver(SQLCheckpointSaver):
+    """
+        Checkpoint saver backed by the application's MySQL database, using the shared connection pool.
+    """
+
+    @contextmanager
+    def _cursor(self):
+        from common.db import get_cursor
+
+        with get_cursor(dictionary=False) as (connection, cursor):
+            yield cursor
+            connection.commit()
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """
+        Create the workflow checkpointer selected by CHECKPOINTER_BACKEND (memory, sqlite or mysql).
+        The memory backend is bounded by CHECKPOINT_MAX_SESSIONS and CHECKPOINT_IDLE_TTL.
+    """
+    if CHECKPOINTER_BACKEND == "sqlite":
+        logger.info(f"Using SQLite checkpointer at {CHECKPOINT_SQLITE_PATH}")
+        return SQLiteCheckpointSaver(CHECKPOINT_SQLITE_PATH)
+    elif CHECKPOINTER_BACKEND == "mysql":
+        logger.info("Using MySQL checkpointer")
+        return MySQLCheckpointSaver()
+    elif CHECKPOINTER_BACKEND == "memory":
+        return BoundedInMemorySaver(CHECKPOINT_MAX_SESSIONS, CHECKPOINT_IDLE_TTL)
+    else:
+        raise ValueError(f"Unknown checkpointer backend: {CHECKPOINTER_BACKEND}")
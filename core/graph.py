@@ -1,12 +1,12 @@
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
 
+from core.checkpoint import create_checkpointer
 from core.state import EMState
 from core.nodes import (intent_detection_node,fetch_pending_dates_node,fetch_user_projects_node,prepare_date_selection_node,
                         generate_form_for_range_node,generate_summary_node,generate_sql_query_node,validate_sql_query_node,
                         execute_sql_query_node,generate_final_response_node)
 
-checkpointer = InMemorySaver()
+checkpointer = create_checkpointer()
 
 
 #ROUTER FUNCTION
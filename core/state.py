@@ -19,8 +19,8 @@ class EMState(TypedDict):
     em_summary: Optional[List[Dict[str, Any]]]
     approval_action: Optional[str]
     validation_passed: Optional[bool]
-    sql_queries: Optional[List[str]]
-    sql_params: Optional[List[tuple]]
+    sql_query: Optional[str]
+    sql_params: Optional[Dict[str, List[Any]]]
     sql_validation_errors: Optional[List[str]]
     execution_result: Optional[Dict[str, Any]]
     inserted_count: Optional[int]
@@ -0,0 +1,116 @@
+"""
+One-shot EM submission.
+
+Runs the summary, validation, parameter and execute steps of the fill_pending
+workflow (core/nodes.py) on a complete payload in a single call: no interrupts,
+no approval round-trip and no checkpoint writes. Form generation is skipped, as
+it only builds the UI schema the caller has already filled in.
+
+submit_team_em_details does the same for many users at once, with set-based
+lookups across all users and one chunked bulk write.
+"""
+from typing import Any, Dict, List, Optional
+
+from common.log import logger
+from core.utils.submissions import build_submission_params, execute_submission, execute_team_submission
+from core.utils.summary import build_summary_entries, build_team_summary_entries
+from core.utils.validation import validate_expansion, validate_submission, validate_summary, validate_team_submissions
+
+
+def submit_em_details(user_id: str, em_details: List[Dict[str, Any]],
+                      date_selection_mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+        Expand, validate and submit a user's EM details. Returns the response status
+        ("validation_failed", "completed" or "failed"), its data and a message.
+    """
+    expanded_entries = build_summary_entries(user_id, em_details, date_selection_mode)
+    logger.info(f"Direct submission for {user_id}: {len(em_details)} EM details expanded to {len(expanded_entries)} entries")
+
+    sql_params = build_submission_params(expanded_entries)
+
+    validation_errors = (validate_expansion(em_details, date_selection_mode, expanded_entries)
+                         or validate_summary(expanded_entries)
+                         or validate_submission(user_id, sql_params))
+
+    if validation_errors:
+        logger.warning(f"Direct submission for {user_id} failed validation: {validation_errors}")
+        return {
+            "status": "validation_failed",
+            "data": {
+                "em_summary": expanded_entries,
+                "total_entries": len(expanded_entries),
+                "validation_errors": validation_errors,
+            },
+            "message": "Please fix validation errors",
+        }
+
+    execution_result = execute_submission(user_id, sql_params)
+
+    return {
+        "status": "completed" if execution_result["success"] else "failed",
+        "data": {
+            "execution_result": execution_result,
+            "inserted_count": execution_result["inserted_count"],
+            "total_entries": len(expanded_entries),
+        },
+        "message": execution_result["message"],
+    }
+
+
+def submit_team_em_details(submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+        Expand, validate and submit EM details of many users ({user_id, em_details,
+        date_selection_mode}, one per user). Users that fail validation are reported and
+        skipped; the others are submitted together. Returns the response status
+        ("completed", "partially_completed" or "failed"), per-user results and a message.
+    """
+    summaries = build_team_summary_entries(submissions)
+    logger.info(f"Team submission for {len(submissions)} users: "
+                f"{sum(len(entries) for entries in summaries.values())} entries")
+
+    validation_errors: Dict[str, List[str]] = {}
+    params_by_user = {}
+    for submission in submissions:
+        user_id = submission["user_id"]
+        expanded_entries = summaries[user_id]
+        errors = (validate_expansion(submission["em_details"], submission.get("date_selection_mode"), expanded_entries)
+                  or validate_summary(expanded_entries))
+        if errors:
+            validation_errors[user_id] = errors
+        else:
+            params_by_user[user_id] = build_submission_params(expanded_entries)
+
+    if params_by_user:
+        for user_id, errors in validate_team_submissions(params_by_user).items():
+            if errors:
+                validation_errors[user_id] = errors
+                del params_by_user[user_id]
+
+    execution_results = execute_team_submission(params_by_user) if params_by_user else {}
+
+    results = []
+    for user_id, expanded_entries in summaries.items():
+        result = {"user_id": user_id, "total_entries": len(expanded_entries)}
+
+        if user_id in validation_errors:
+            result.update(status="validation_failed", inserted_count=0, validation_errors=validation_errors[user_id])
+        else:
+            execution_result = execution_results[user_id]
+            result.update(status="completed" if execution_result["success"] else "failed",
+                          inserted_count=execution_result["inserted_count"], message=execution_result["message"])
+        results.append(result)
+
+    completed = sum(result["status"] == "completed" for result in results)
+    if validation_errors:
+        logger.warning(f"Team submission: {len(validation_errors)} users failed validation")
+
+    return {
+        "status": "completed" if completed == len(results) else "partially_completed" if completed else "failed",
+        "data": {
+            "results": results,
+            "completed_users": completed,
+            "total_users": len(results),
+            "inserted_count": sum(result["inserted_count"] for result in results),
+        },
+        "message": f"Submitted EMs for {completed} of {len(results)} users",
+    }
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Returned by UserLRUCache.get on a miss, so that None can be cached as a value
+MISSING = object()
+
+
+class UserLRUCache:
+    """
+        Thread-safe LRU + TTL cache of per-user values. Keys are tuples whose first item is
+        the user_id, so all entries of a user can be invalidated together. Each value may
+        carry the revision it was read at; a lookup with a different revision is a miss.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Hashable, ...], revision: Any = None) -> Any:
+        """The cached value of key, or MISSING when it is absent, expired or of another revision"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > time.monotonic() and cached[1] == revision:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: Tuple[Hashable, ...], value: Any, revision: Any = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, revision, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop cached entries of one user, or everything when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,200 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.db import get_cursor
+from common.pending_stats import ensure_pending_stats_table
+from core.utils.cache import MISSING, UserLRUCache
+from core.utils.pending_stats import fetch_user_pending_summary
+
+PENDING_DATES_CACHE_SIZE = int(os.getenv("PENDING_DATES_CACHE_SIZE", "10000"))
+PENDING_DATES_CACHE_TTL = float(os.getenv("PENDING_DATES_CACHE_TTL", "300"))
+
+# "stats" checks every cached list against the user's em_pending_stats revision, so writes
+# from other processes (imports, submissions on other workers) are seen at once for the
+# price of a primary-key read. "none" serves cached lists from memory: writes made outside
+# this process then stay invisible for up to PENDING_DATES_CACHE_TTL seconds.
+PENDING_DATES_CACHE_VALIDATION = os.getenv("PENDING_DATES_CACHE_VALIDATION", "stats").lower()
+
+# Workflow queries against em_data. common/query_plans.py EXPLAINs these exact statements.
+PENDING_DATES_QUERY = "select distinct em_date from em_data where user_id = %s and is_em_submitted = %s and is_working_day = %s order by em_date asc"
+
+PROJECT_PENDING_DATES_QUERY = "select distinct em_date from em_data where user_id = %s and is_em_submitted = %s and is_working_day = %s and project_id in ({project_placeholders}) order by em_date asc"
+
+# Keyset page: starts after the last date of the previous page. DISTINCT keeps a date that
+# spans several projects from being split across pages. project_filter is empty or an
+# "and project_id in (...)" clause.
+PENDING_DATES_PAGE_QUERY = "select distinct em_date from em_data where user_id = %s and is_em_submitted = %s and is_working_day = %s and em_date > %s {project_filter} order by em_date asc limit %s"
+
+# Pending working days of some projects inside a date window; covered by idx_user_pending
+PENDING_DAYS_IN_RANGE_QUERY = "select project_id, em_date from em_data where user_id = %s and is_em_submitted = %s and is_working_day = %s and em_date between %s and %s and project_id in ({project_placeholders})"
+
+# The same for several users at once, one (user_id, project_id) pair per placeholder
+TEAM_PENDING_DAYS_IN_RANGE_QUERY = "select user_id, project_id, em_date from em_data where (user_id, project_id) in ({pair_placeholders}) and is_em_submitted = %s and is_working_day = %s and em_date between %s and %s"
+
+PENDING_DATES_STREAM_BATCH = 500
+PENDING_PAIR_CHUNK_SIZE = 1000
+
+ProjectKey = Optional[Tuple[str, ...]]
+
+
+class PendingDatesCache(UserLRUCache):
+    """
+        LRU + TTL cache of pending-date lists keyed by (user_id, project set), where a
+        project set of None means all of the user's projects. Lookups that needed the
+        database, hits included when they are validated, are counted with their time,
+        so the hit rate is read together with what each lookup still costs.
+    """
+
+    def __init__(self, max_entries: int = PENDING_DATES_CACHE_SIZE, ttl: float = PENDING_DATES_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+        self.db_lookups = 0
+        self.db_ms = 0.0
+
+    def record_db_lookup(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.db_lookups += 1
+            self.db_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                **stats,
+                "validation": PENDING_DATES_CACHE_VALIDATION,
+                "db_lookups": self.db_lookups,
+                "db_lookup_rate": round(self.db_lookups / lookups, 4) if lookups else 0.0,
+                "db_ms_per_lookup": round(self.db_ms / self.db_lookups, 3) if self.db_lookups else 0.0,
+            }
+
+
+pending_dates_cache = PendingDatesCache()
+
+
+def fetch_pending_dates(cursor, user_id: str, projects: ProjectKey = None) -> List[str]:
+    """Pending working dates of the user, optionally limited to some projects, oldest first"""
+    if projects is None:
+        cursor.execute(PENDING_DATES_QUERY, (user_id, False, True))
+    else:
+        project_placeholders = ','.join(['%s'] * len(projects))
+        cursor.execute(PROJECT_PENDING_DATES_QUERY.format(project_placeholders=project_placeholders),
+                       [user_id, False, True] + list(projects))
+
+    return [row['em_date'].strftime("%Y-%m-%d") for row in cursor.fetchall()]
+
+
+def fetch_pending_days_in_range(cursor, user_id: str, project_ids: List[str], start_date: str,
+                                end_date: str) -> List[Tuple[str, Any]]:
+    """(project_id, em_date) of the user's pending working days between two dates, inclusive"""
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids:
+        return []
+
+    project_placeholders = ','.join(['%s'] * len(project_ids))
+    cursor.execute(PENDING_DAYS_IN_RANGE_QUERY.format(project_placeholders=project_placeholders),
+                   [user_id, False, True, start_date, end_date] + project_ids)
+    return [(row['project_id'], row['em_date']) for row in cursor.fetchall()]
+
+
+def fetch_team_pending_days_in_range(cursor, pairs: List[Tuple[str, str]], start_date: str,
+                                     end_date: str) -> List[Tuple[str, str, Any]]:
+    """(user_id, project_id, em_date) of the pending working days of many (user_id, project_id) pairs"""
+    pairs = list(dict.fromkeys(pairs))
+    pending_days = []
+
+    for start in range(0, len(pairs), PENDING_PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PENDING_PAIR_CHUNK_SIZE]
+        pair_placeholders = ','.join(['(%s, %s)'] * len(chunk))
+        cursor.execute(TEAM_PENDING_DAYS_IN_RANGE_QUERY.format(pair_placeholders=pair_placeholders),
+                       [part for pair in chunk for part in pair] + [False, True, start_date, end_date])
+        pending_days.extend((row['user_id'], row['project_id'], row['em_date']) for row in cursor.fetchall())
+
+    return pending_days
+
+
+def get_pending_dates(user_id: str, project_ids: Optional[List[str]] = None) -> List[str]:
+    """
+        Read-through lookup of a user's pending dates, for all projects or only the given ones.
+        A miss is answered from em_pending_stats when it shows nothing pending, and from
+        em_data otherwise. With "stats" validation the revision check and a miss share
+        one pooled connection; with "none" a hit never touches the database.
+    """
+    projects = None if project_ids is None else tuple(sorted(set(project_ids)))
+    if projects == ():
+        return []
+
+    validated = PENDING_DATES_CACHE_VALIDATION == "stats"
+    if not validated:
+        cached = pending_dates_cache.get((user_id, projects))
+        if cached is not MISSING:
+            return cached
+
+    started = time.perf_counter()
+    revision = None
+    with get_cursor() as (connection, cursor):
+        ensure_pending_stats_table(cursor)
+        summary = fetch_user_pending_summary(cursor, user_id)
+
+        cached = MISSING
+        if validated:
+            revision = (summary["pairs"], summary["revision"])
+            cached = pending_dates_cache.get((user_id, projects), revision)
+
+        if cached is not MISSING:
+            pending_dates = cached
+        elif summary["pairs"] and summary["pending_working_days"] == 0:
+            pending_dates = []
+        else:
+            pending_dates = fetch_pending_dates(cursor, user_id, projects)
+        connection.commit()
+    pending_dates_cache.record_db_lookup((time.perf_counter() - started) * 1000)
+
+    if cached is MISSING:
+        pending_dates_cache.put((user_id, projects), pending_dates, revision)
+    return pending_dates
+
+
+def fetch_pending_dates_page(cursor, user_id: str, limit: int, after: Optional[str] = None,
+                             project_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+        One page of the user's pending working dates, optionally limited to some projects,
+        oldest first. Pass the returned next_after as after to fetch the following page;
+        it is None on the last page.
+    """
+    project_filter, project_params = "", []
+    if project_ids:
+        project_filter = f"and project_id in ({','.join(['%s'] * len(project_ids))})"
+        project_params = list(project_ids)
+
+    cursor.execute(PENDING_DATES_PAGE_QUERY.format(project_filter=project_filter),
+                   [user_id, False, True, after or "1000-01-01"] + project_params + [limit])
+    pending_dates = [row['em_date'].strftime("%Y-%m-%d") for row in cursor.fetchall()]
+
+    return {
+        "pending_dates": pending_dates,
+        "next_after": pending_dates[-1] if len(pending_dates) == limit else None,
+    }
+
+
+def get_pending_dates_page(user_id: str, limit: int, after: Optional[str] = None,
+                           project_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    with get_cursor() as (connection, cursor):
+        page = fetch_pending_dates_page(cursor, user_id, limit, after, project_ids)
+        connection.commit()
+    return page
+
+
+def iter_pending_dates(user_id: str, after: Optional[str] = None, project_ids: Optional[List[str]] = None,
+                       batch_size: int = PENDING_DATES_STREAM_BATCH):
+    """
+        Yield the user's pending dates after the given date, one keyset page at a time.
+        Each page is a short query on its own pooled connection, so a slow consumer never
+        holds a connection or an open result set.
+    """
+    while True:
+        page = get_pending_dates_page(user_id, batch_size, after, project_ids)
+        yield from page["pending_dates"]
+        if page["next_after"] is None:
+            return
+        after = page["next_after"]
@@ -0,0 +1,79 @@
+"""
+Reads of the per-(user, project) pending-EM counters in em_pending_stats.
+
+The table and the recounts every write path runs are in common/pending_stats.py.
+Reconcile drift from manual edits with:
+
+    python -m core.utils.pending_stats
+"""
+from typing import Any, Dict, Optional
+
+from common.db import get_cursor
+from common.pending_stats import ensure_pending_stats_table, rebuild_pending_stats
+
+# (pairs, revision) changes whenever any counter of the user is recounted, so it can tag
+# data derived from the user's pending rows
+USER_PENDING_SUMMARY_QUERY = """
+    SELECT COUNT(*) AS pairs,
+           COALESCE(SUM(revision), 0) AS revision,
+           COALESCE(SUM(pending_working_days), 0) AS pending_working_days
+    FROM em_pending_stats
+    WHERE user_id = %s
+"""
+
+USER_PENDING_STATS_QUERY = """
+    SELECT project_id, pending_count, pending_working_days
+    FROM em_pending_stats
+    WHERE user_id = %s
+"""
+
+
+def fetch_user_pending_summary(cursor, user_id: str) -> Dict[str, int]:
+    """Counter pairs, summed revision and pending working days of one user"""
+    cursor.execute(USER_PENDING_SUMMARY_QUERY, (user_id,))
+    return {key: int(value) for key, value in cursor.fetchone().items()}
+
+
+def fetch_user_pending_stats(cursor, user_id: str) -> Optional[Dict[str, Any]]:
+    """Pending counters of one user, in total and per project; None when the user has no counters"""
+    cursor.execute(USER_PENDING_STATS_QUERY, (user_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+
+    return {
+        "user_id": user_id,
+        "pending_count": sum(row["pending_count"] for row in rows),
+        "pending_working_days": sum(row["pending_working_days"] for row in rows),
+        "projects": [
+            {
+                "project_id": row["project_id"],
+                "pending_count": row["pending_count"],
+                "pending_working_days": row["pending_working_days"],
+            }
+            for row in rows
+        ],
+    }
+
+
+def get_user_pending_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    with get_cursor() as (connection, cursor):
+        ensure_pending_stats_table(cursor)
+        stats = fetch_user_pending_stats(cursor, user_id)
+        connection.commit()
+    return stats
+
+
+def main():
+    with get_cursor() as (connection, cursor):
+        ensure_pending_stats_table(cursor)
+        connection.commit()
+        print("Rebuilding em_pending_stats from em_data...")
+        result = rebuild_pending_stats(connection, cursor)
+
+    print(f"Checked {result['checked']} (user, project) pairs: "
+          f"corrected {result['corrected']}, removed {result['removed']}")
+
+
+if __name__ == "__main__":
+    main()
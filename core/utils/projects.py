@@ -0,0 +1,290 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from common.db import get_cursor
+from core.utils.cache import MISSING, UserLRUCache
+
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", "10000"))
+# The importer runs in its own process, so metadata changed by an import reaches the API
+# workers only when their cached entries expire: PROJECT_CACHE_TTL bounds that staleness.
+# Submissions invalidate the submitting worker's entries directly.
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "300"))
+PROJECT_PAIR_CHUNK_SIZE = 1000
+
+UserProject = Tuple[str, str]
+
+USER_PROJECTS_SELECT = """
+    SELECT project_id,
+           MAX(project_name) AS project_name,
+           MAX(project_code) AS project_code,
+           MAX(client_name) AS client_name,
+           SUM(is_em_submitted = FALSE AND is_working_day = TRUE) AS pending_days,
+           MIN(CASE WHEN is_em_submitted = FALSE AND is_working_day = TRUE THEN em_date END) AS first_pending_date,
+           MAX(CASE WHEN is_em_submitted = FALSE AND is_working_day = TRUE THEN em_date END) AS last_pending_date
+    FROM em_data
+    WHERE user_id = %s AND is_project_assigned = %s
+"""
+
+# One row per assigned project. common/query_plans.py EXPLAINs these exact statements.
+USER_PROJECTS_QUERY = USER_PROJECTS_SELECT + "GROUP BY project_id"
+
+# Keyset page in project_id (index) order: starts after the last project of the previous page
+USER_PROJECTS_PAGE_QUERY = USER_PROJECTS_SELECT + """
+    AND project_id > %s
+    GROUP BY project_id
+    ORDER BY project_id
+    LIMIT %s
+"""
+
+USER_PROJECTS_STREAM_BATCH = 500
+
+PROJECT_METADATA_COLUMNS = [
+    "user_role", "client_name", "project_id", "project_name",
+    "task_type", "billing_type", "upwork_hours", "time_spend_hours",
+    "billable_hours", "billable_description", "nonbillable_hours",
+    "nonbillable_description", "qa_required", "task_incharge_name",
+    "meter_name", "project_code",
+]
+
+
+def project_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready project row of USER_PROJECTS_QUERY"""
+    return {
+        **row,
+        "pending_days": int(row["pending_days"] or 0),
+        "first_pending_date": row["first_pending_date"].strftime("%Y-%m-%d") if row["first_pending_date"] else None,
+        "last_pending_date": row["last_pending_date"].strftime("%Y-%m-%d") if row["last_pending_date"] else None,
+    }
+
+
+def fetch_user_projects_page(cursor, user_id: str, limit: int, after: Optional[str] = None) -> Dict[str, Any]:
+    """
+        One page of the user's assigned projects ordered by project_id. Pass the returned
+        next_after as after to fetch the following page; it is None on the last page.
+    """
+    cursor.execute(USER_PROJECTS_PAGE_QUERY, (user_id, True, after or "", limit))
+    projects = [project_summary(row) for row in cursor.fetchall()]
+
+    return {
+        "projects": projects,
+        "next_after": projects[-1]["project_id"] if len(projects) == limit else None,
+    }
+
+
+def get_user_projects_page(user_id: str, limit: int, after: Optional[str] = None) -> Dict[str, Any]:
+    with get_cursor() as (connection, cursor):
+        page = fetch_user_projects_page(cursor, user_id, limit, after)
+        connection.commit()
+    return page
+
+
+def iter_user_projects(user_id: str, after: Optional[str] = None, batch_size: int = USER_PROJECTS_STREAM_BATCH):
+    """Yield the user's assigned projects after the given project_id, one keyset page at a time"""
+    while True:
+        page = get_user_projects_page(user_id, batch_size, after)
+        yield from page["projects"]
+        if page["next_after"] is None:
+            return
+        after = page["next_after"]
+
+
+def project_metadata_query(project_count: int) -> str:
+    """SQL for fetch_project_metadata with project_count project_id placeholders"""
+    columns = ", ".join(f"d.{column}" for column in PROJECT_METADATA_COLUMNS)
+    project_placeholders = ','.join(['%s'] * project_count)
+
+    return f"""
+        SELECT {columns}
+        FROM em_data d
+        JOIN (
+            SELECT MIN(em_id) AS em_id
+            FROM em_data
+            WHERE user_id = %s AND project_id IN ({project_placeholders})
+            GROUP BY project_id
+        ) first_rows ON first_rows.em_id = d.em_id
+    """
+
+
+def fetch_project_metadata(cursor, user_id: str, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+        Fetch one representative em_data row per project for the user in a single query.
+        Returns the rows keyed by project_id; projects with no rows are absent.
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids:
+        return {}
+
+    cursor.execute(project_metadata_query(len(project_ids)), [user_id] + project_ids)
+
+    return {row["project_id"]: row for row in cursor.fetchall()}
+
+
+def team_project_metadata_query(pair_count: int) -> str:
+    """SQL for fetch_team_project_metadata with pair_count (user_id, project_id) placeholders"""
+    columns = ", ".join(f"d.{column}" for column in PROJECT_METADATA_COLUMNS)
+    pair_placeholders = ','.join(['(%s, %s)'] * pair_count)
+
+    return f"""
+        SELECT d.user_id AS metadata_user_id, {columns}
+        FROM em_data d
+        JOIN (
+            SELECT MIN(em_id) AS em_id
+            FROM em_data
+            WHERE (user_id, project_id) IN ({pair_placeholders})
+            GROUP BY user_id, project_id
+        ) first_rows ON first_rows.em_id = d.em_id
+    """
+
+
+def fetch_team_project_metadata(cursor, pairs: Iterable[UserProject]) -> Dict[UserProject, Dict[str, Any]]:
+    """
+        fetch_project_metadata for many users at once: one query per chunk of
+        (user_id, project_id) pairs. Returns entries keyed by pair; pairs with no rows are absent.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    projects = {}
+
+    for start in range(0, len(pairs), PROJECT_PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PROJECT_PAIR_CHUNK_SIZE]
+        cursor.execute(team_project_metadata_query(len(chunk)), [part for pair in chunk for part in pair])
+
+        for row in cursor.fetchall():
+            user_id = row.pop("metadata_user_id")
+            projects[(user_id, row["project_id"])] = row
+
+    return projects
+
+
+def assigned_projects_query(pair_count: int) -> str:
+    """SQL for fetch_assigned_projects with pair_count (user_id, project_id) placeholders"""
+    pair_placeholders = ','.join(['(%s, %s)'] * pair_count)
+
+    return f"""
+        SELECT DISTINCT user_id, project_id
+        FROM em_data
+        WHERE (user_id, project_id) IN ({pair_placeholders}) AND is_project_assigned = TRUE
+    """
+
+
+def fetch_assigned_projects(cursor, pairs: Iterable[UserProject]) -> Dict[str, Set[str]]:
+    """
+        Which of the (user_id, project_id) pairs are assigned, read with one query per chunk
+        of pairs. Returns the assigned project_ids by user_id.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    assigned: Dict[str, Set[str]] = {}
+
+    for start in range(0, len(pairs), PROJECT_PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PROJECT_PAIR_CHUNK_SIZE]
+        cursor.execute(assigned_projects_query(len(chunk)), [part for pair in chunk for part in pair])
+        for row in cursor.fetchall():
+            assigned.setdefault(row["user_id"], set()).add(row["project_id"])
+
+    return assigned
+
+
+class ProjectMetadataCache(UserLRUCache):
+    """
+        LRU + TTL cache of per-user project metadata keyed by (user_id, project_id).
+        Projects with no em_data rows are cached as None so repeated misses stay cheap.
+        Only form and summary metadata is cached; project assignment is always read live.
+    """
+
+    def __init__(self, max_entries: int = PROJECT_CACHE_SIZE, ttl: float = PROJECT_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+
+    def get_many(self, user_id: str, project_ids: List[str]):
+        """Return (cached entries by project_id, project_ids that must be fetched)"""
+        found, missing = {}, []
+
+        for project_id in dict.fromkeys(project_ids):
+            entry = self.get((user_id, project_id))
+            if entry is MISSING:
+                missing.append(project_id)
+            else:
+                found[project_id] = entry
+
+        return found, missing
+
+    def put_many(self, user_id: str, entries: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        for project_id, entry in entries.items():
+            self.put((user_id, project_id), entry)
+
+
+project_cache = ProjectMetadataCache()
+
+
+def _get_projects(user_id: str, project_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    found, missing = project_cache.get_many(user_id, project_ids)
+
+    if missing:
+        with get_cursor() as (connection, cursor):
+            fetched = fetch_project_metadata(cursor, user_id, missing)
+            connection.commit()
+
+        entries = {project_id: fetched.get(project_id) for project_id in missing}
+        project_cache.put_many(user_id, entries)
+        found.update(entries)
+
+    return found
+
+
+def get_project_metadata(user_id: str, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Read-through lookup of project metadata rows keyed by project_id"""
+    return {
+        project_id: metadata
+        for project_id, metadata in _get_projects(user_id, project_ids).items()
+        if metadata is not None
+    }
+
+
+def get_assigned_projects(user_id: str, project_ids: List[str]) -> Set[str]:
+    """
+        Which of the given projects are assigned to the user. This gates submissions, so it
+        is read live: an import in another process must take effect at once in every worker.
+    """
+    return get_team_assigned_projects((user_id, project_id) for project_id in project_ids).get(user_id, set())
+
+
+def get_team_assigned_projects(pairs: Iterable[UserProject]) -> Dict[str, Set[str]]:
+    """Live lookup of the assigned project_ids by user_id among many (user_id, project_id) pairs"""
+    pairs = list(pairs)
+    if not pairs:
+        return {}
+
+    with get_cursor() as (connection, cursor):
+        assigned = fetch_assigned_projects(cursor, pairs)
+        connection.commit()
+    return assigned
+
+
+def get_team_project_metadata(pairs: Iterable[UserProject]) -> Dict[UserProject, Dict[str, Any]]:
+    """
+        Read-through lookup of project metadata rows for many users, keyed by
+        (user_id, project_id); pairs without rows are absent. Cache misses of all
+        users are fetched together.
+    """
+    found, missing = {}, []
+    for user_id, project_ids in _group_pairs(pairs).items():
+        user_found, user_missing = project_cache.get_many(user_id, project_ids)
+        found.update({(user_id, project_id): entry for project_id, entry in user_found.items()})
+        missing.extend((user_id, project_id) for project_id in user_missing)
+
+    if missing:
+        with get_cursor() as (connection, cursor):
+            fetched = fetch_team_project_metadata(cursor, missing)
+            connection.commit()
+
+        entries = {pair: fetched.get(pair) for pair in missing}
+        for user_id, project_ids in _group_pairs(missing).items():
+            project_cache.put_many(user_id, {project_id: entries[(user_id, project_id)] for project_id in project_ids})
+        found.update(entries)
+
+    return {pair: metadata for pair, metadata in found.items() if metadata is not None}
+
+
+def _group_pairs(pairs: Iterable[UserProject]) -> Dict[str, List[str]]:
+    grouped: Dict[str, List[str]] = {}
+    for user_id, project_id in dict.fromkeys(pairs):
+        grouped.setdefault(user_id, []).append(project_id)
+    return grouped
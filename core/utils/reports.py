@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from common.db import get_cursor
+
+REPORT_PAGE_SIZE = 50
+REPORT_MAX_PAGE_SIZE = 500
+REPORT_SUMMARY_TTL = float(os.getenv("REPORT_SUMMARY_TTL", "30"))
+
+# One pass over idx_user_submitted (user_id, is_em_submitted) instead of one COUNT per figure
+SUMMARY_QUERY = """
+    SELECT COUNT(*) AS total_records,
+           COUNT(DISTINCT user_id) AS total_users,
+           COALESCE(SUM(is_em_submitted = TRUE), 0) AS submitted,
+           COALESCE(SUM(is_em_submitted = FALSE), 0) AS pending
+    FROM em_data
+"""
+
+# Keyset page over idx_user_pending: the range starts after the last user of the previous
+# page and rows arrive grouped by user_id, so LIMIT stops the scan once the page is full
+PENDING_BY_USER_QUERY = """
+    SELECT user_id,
+           MAX(user_name) AS user_name,
+           COUNT(*) AS pending_count,
+           SUM(is_working_day = TRUE) AS pending_working_days,
+           MIN(em_date) AS first_pending_date
+    FROM em_data
+    WHERE user_id > %s AND is_em_submitted = FALSE
+    GROUP BY user_id
+    ORDER BY user_id
+    LIMIT %s
+"""
+
+_summary_lock = threading.Lock()
+_summary_cache = None
+
+
+def fetch_summary(cursor) -> Dict[str, int]:
+    """Totals, distinct users and submitted/pending counts of em_data"""
+    cursor.execute(SUMMARY_QUERY)
+    row = cursor.fetchone()
+    return {key: int(value) for key, value in row.items()}
+
+
+def fetch_pending_by_user(cursor, limit: int = REPORT_PAGE_SIZE, after: Optional[str] = None) -> Dict[str, Any]:
+    """
+        One page of per-user pending counts ordered by user_id. Pass the returned
+        next_after as after to fetch the following page; it is None on the last page.
+    """
+    cursor.execute(PENDING_BY_USER_QUERY, (after or "", limit))
+
+    users: List[Dict[str, Any]] = [
+        {
+            "user_id": row["user_id"],
+            "user_name": row["user_name"],
+            "pending_count": int(row["pending_count"]),
+            "pending_working_days": int(row["pending_working_days"]),
+            "first_pending_date": row["first_pending_date"].strftime("%Y-%m-%d"),
+        }
+        for row in cursor.fetchall()
+    ]
+
+    return {
+        "users": users,
+        "next_after": users[-1]["user_id"] if len(users) == limit else None,
+    }
+
+
+def get_summary() -> Dict[str, int]:
+    """Summary counts, recomputed at most every REPORT_SUMMARY_TTL seconds"""
+    global _summary_cache
+
+    with _summary_lock:
+        if _summary_cache is not None and _summary_cache[0] > time.monotonic():
+            return _summary_cache[1]
+
+    with get_cursor() as (connection, cursor):
+        connection.start_transaction(readonly=True)
+        summary = fetch_summary(cursor)
+        connection.commit()
+
+    with _summary_lock:
+        _summary_cache = (time.monotonic() + REPORT_SUMMARY_TTL, summary)
+    return summary
+
+
+def get_pending_by_user(limit: int = REPORT_PAGE_SIZE, after: Optional[str] = None) -> Dict[str, Any]:
+    with get_cursor() as (connection, cursor):
+        connection.start_transaction(readonly=True)
+        page = fetch_pending_by_user(cursor, min(limit, REPORT_MAX_PAGE_SIZE), after)
+        connection.commit()
+    return page
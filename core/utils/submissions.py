@@ -0,0 +1,276 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from common.db import get_cursor
+from common.log import logger
+from common.pending_stats import ensure_pending_stats_table, refresh_pending_stats
+from core.utils.pending_dates import pending_dates_cache
+from core.utils.projects import project_cache
+
+SUBMISSION_KEY_CHUNK_SIZE = 1000
+SUBMISSION_WRITE_CHUNK_SIZE = int(os.getenv("EM_SUBMISSION_CHUNK_SIZE", "500"))
+
+SubmissionKey = Tuple[str, str, str]
+
+# em_data columns written on submission, in the order they appear in a staged row
+SUBMISSION_VALUE_COLUMNS = (
+    "task_type", "time_spend_hours", "time_spend_minutes",
+    "billable_hours", "billable_minutes", "billable_description",
+    "nonbillable_hours", "nonbillable_minutes", "nonbillable_description",
+    "qa_required", "task_incharge_name", "meter_name", "billing_type", "upwork_hours",
+)
+SUBMISSION_KEY_COLUMNS = ("user_id", "em_date", "project_id")
+STAGE_COLUMNS = SUBMISSION_VALUE_COLUMNS + SUBMISSION_KEY_COLUMNS
+
+# Columnar submission parameters kept in EMState; user_id comes from the state itself
+SUBMISSION_PARAM_COLUMNS = SUBMISSION_VALUE_COLUMNS + ("em_date", "project_id")
+
+CREATE_STAGE_TABLE_QUERY = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS em_submission_stage (
+        task_type VARCHAR(50),
+        time_spend_hours INT,
+        time_spend_minutes INT,
+        billable_hours INT,
+        billable_minutes INT,
+        billable_description TEXT,
+        nonbillable_hours INT,
+        nonbillable_minutes INT,
+        nonbillable_description TEXT,
+        qa_required BOOLEAN,
+        task_incharge_name VARCHAR(100),
+        meter_name VARCHAR(100),
+        billing_type VARCHAR(20),
+        upwork_hours INT,
+        user_id VARCHAR(50) NOT NULL,
+        em_date DATE NOT NULL,
+        project_id VARCHAR(50) NOT NULL,
+        PRIMARY KEY (user_id, em_date, project_id)
+    )
+"""
+
+STAGE_INSERT_QUERY = f"""
+    INSERT INTO em_submission_stage ({", ".join(STAGE_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(STAGE_COLUMNS))})
+"""
+
+# Locks the pending em_data rows the chunk will update and reports which keys they belong to
+STAGE_MATCH_QUERY = """
+    SELECT DISTINCT s.user_id, s.em_date, s.project_id
+    FROM em_submission_stage s
+    JOIN em_data d ON d.user_id = s.user_id AND d.em_date = s.em_date AND d.project_id = s.project_id
+    WHERE d.is_em_submitted = FALSE
+    FOR UPDATE
+"""
+
+STAGE_UPDATE_QUERY = f"""
+    UPDATE em_data d
+    JOIN em_submission_stage s
+        ON d.user_id = s.user_id AND d.em_date = s.em_date AND d.project_id = s.project_id
+    SET
+        d.is_em_submitted = TRUE,
+        {", ".join(f"d.{column} = s.{column}" for column in SUBMISSION_VALUE_COLUMNS)},
+        d.updated_at = NOW()
+    WHERE d.is_em_submitted = FALSE
+"""
+
+
+def submission_status_query(key_count: int) -> str:
+    """SQL for fetch_submission_status with key_count (user_id, em_date, project_id) placeholders"""
+    placeholders = ','.join(['(%s, %s, %s)'] * key_count)
+
+    return f"""
+        SELECT user_id, em_date, project_id, MAX(is_em_submitted) AS is_em_submitted
+        FROM em_data
+        WHERE (user_id, em_date, project_id) IN ({placeholders})
+        GROUP BY user_id, em_date, project_id
+    """
+
+
+def fetch_submission_status(cursor, keys: Iterable[SubmissionKey]) -> Dict[SubmissionKey, bool]:
+    """
+        Look up whether EMs are already submitted for many (user_id, em_date, project_id)
+        keys at once, using the uq_user_date_project key. em_date is a YYYY-MM-DD string.
+        Returns is_em_submitted per key that has em_data rows; keys without rows are absent.
+    """
+    keys = list(dict.fromkeys(keys))
+    status = {}
+
+    for start in range(0, len(keys), SUBMISSION_KEY_CHUNK_SIZE):
+        chunk = keys[start:start + SUBMISSION_KEY_CHUNK_SIZE]
+        cursor.execute(submission_status_query(len(chunk)), [part for key in chunk for part in key])
+
+        for row in cursor.fetchall():
+            status[(row["user_id"], row["em_date"].strftime("%Y-%m-%d"), row["project_id"])] = bool(row["is_em_submitted"])
+
+    return status
+
+
+def build_submission_params(em_summary: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Columnar submission parameters (SUBMISSION_PARAM_COLUMNS) of an approved EM summary"""
+    sql_params = {column: [] for column in SUBMISSION_PARAM_COLUMNS}
+
+    for entry in em_summary:
+        sql_params["task_type"].append(entry.get("task_type", "Development"))
+        sql_params["time_spend_hours"].append(entry.get("time_spend_hours", 0))
+        sql_params["time_spend_minutes"].append(0)
+        sql_params["billable_hours"].append(entry.get("billable_hours", 0))
+        sql_params["billable_minutes"].append(0)
+        sql_params["billable_description"].append(entry.get("billable_description", ""))
+        sql_params["nonbillable_hours"].append(entry.get("nonbillable_hours", 0))
+        sql_params["nonbillable_minutes"].append(0)
+        sql_params["nonbillable_description"].append(entry.get("nonbillable_description", ""))
+        sql_params["qa_required"].append(entry.get("qa_required", False))
+        sql_params["task_incharge_name"].append(entry.get("task_incharge_name", ""))
+        sql_params["meter_name"].append(entry.get("meter_name", ""))
+        sql_params["billing_type"].append(entry.get("billing_type", "Hourly"))
+        sql_params["upwork_hours"].append(entry.get("upwork_hours", 0))
+        sql_params["em_date"].append(entry.get("date"))
+        sql_params["project_id"].append(entry.get("project_id"))
+
+    return sql_params
+
+
+def build_submission_rows(user_id: str, sql_params: Dict[str, List[Any]]) -> List[Tuple]:
+    """Turn columnar submission parameters into rows ordered as STAGE_COLUMNS"""
+    if not sql_params:
+        return []
+
+    values = [sql_params[column] for column in SUBMISSION_VALUE_COLUMNS]
+    return [
+        (*row_values, user_id, em_date, project_id)
+        for *row_values, em_date, project_id in zip(*values, sql_params["em_date"], sql_params["project_id"])
+    ]
+
+
+def apply_submissions(connection, cursor, rows: Sequence[Sequence[Any]],
+                      chunk_size: int = SUBMISSION_WRITE_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+        Submit EM rows (ordered as STAGE_COLUMNS) in bulk. Each chunk is staged in a
+        temporary table and applied with one joined UPDATE in its own transaction.
+
+        Only pending rows are updated, and em_pending_stats is recounted for the touched
+        (user_id, project_id) pairs in the same transaction. A key repeated in the input is applied once, using its
+        first occurrence, which matches running one UPDATE per entry in order. Returns the
+        keys that were submitted, the count of committed entries, the error that stopped
+        the run, if any, and the rows of the failed chunk and after, which were not applied.
+    """
+    seen_keys = set()
+    unique_rows = []
+    for row in rows:
+        user_id, em_date, project_id = row[len(SUBMISSION_VALUE_COLUMNS):]
+        key = (user_id, datetime.strptime(em_date, "%Y-%m-%d").date(), project_id)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            unique_rows.append(row)
+
+    submitted_keys: List[SubmissionKey] = []
+    error = None
+    unapplied_rows: List[Sequence[Any]] = []
+
+    ensure_pending_stats_table(cursor)
+    cursor.execute(CREATE_STAGE_TABLE_QUERY)
+    connection.commit()
+    try:
+        for start in range(0, len(unique_rows), chunk_size):
+            chunk = unique_rows[start:start + chunk_size]
+            try:
+                connection.start_transaction()
+                cursor.execute("DELETE FROM em_submission_stage")
+                cursor.executemany(STAGE_INSERT_QUERY, chunk)
+
+                cursor.execute(STAGE_MATCH_QUERY)
+                chunk_keys = [(row["user_id"], row["em_date"].strftime("%Y-%m-%d"), row["project_id"])
+                              for row in cursor.fetchall()]
+
+                cursor.execute(STAGE_UPDATE_QUERY)
+                refresh_pending_stats(cursor, ((user_id, project_id) for user_id, _, project_id in chunk_keys))
+                connection.commit()
+
+                submitted_keys.extend(chunk_keys)
+                logger.info(f"Applied submission chunk {start // chunk_size + 1}: "
+                            f"{len(chunk_keys)}/{len(chunk)} entries updated")
+
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Submission chunk starting at entry {start + 1} failed, rolled back: {str(e)}")
+                error = str(e)
+                unapplied_rows = unique_rows[start:]
+                break
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS em_submission_stage")
+
+    return {
+        "submitted_keys": submitted_keys,
+        "inserted_count": len(submitted_keys),
+        "error": error,
+        "unapplied_rows": unapplied_rows,
+    }
+
+
+def execution_result(inserted_count: int, error: Optional[str]) -> Dict[str, Any]:
+    """Execution result reported to a user for their committed entries and the error, if any"""
+    if error is None:
+        return {
+            "success": True,
+            "message": f"Successfully submitted {inserted_count} EM entries",
+            "inserted_count": inserted_count
+        }
+
+    return {
+        "success": False,
+        "message": f"Database error: {error}",
+        "inserted_count": inserted_count
+    }
+
+
+def execute_submission(user_id: str, sql_params: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """
+        Apply a user's validated submission parameters and drop the user's cached workflow
+        data. Returns the execution result reported to the user.
+    """
+    with get_cursor() as (connection, cursor):
+        result = apply_submissions(connection, cursor, build_submission_rows(user_id, sql_params))
+
+    inserted_count = result["inserted_count"]
+    if inserted_count:
+        project_cache.invalidate(user_id)
+        pending_dates_cache.invalidate(user_id)
+
+    if result["error"] is None:
+        logger.info(f"Successfully inserted/updated {inserted_count} EM entries")
+    else:
+        logger.error(f"Submission failed after {inserted_count} committed entries, "
+                     f"current chunk rolled back: {result['error']}")
+
+    return execution_result(inserted_count, result["error"])
+
+
+def execute_team_submission(params_by_user: Dict[str, Dict[str, List[Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+        Apply many users' validated submission parameters in one chunked bulk run and drop
+        their cached workflow data. Returns the execution result of each user; a user
+        fails when any of their entries was in the chunk that failed or after it.
+    """
+    rows = [row for user_id, sql_params in params_by_user.items() for row in build_submission_rows(user_id, sql_params)]
+
+    with get_cursor() as (connection, cursor):
+        result = apply_submissions(connection, cursor, rows)
+
+    inserted_counts: Dict[str, int] = {}
+    for user_id, _, _ in result["submitted_keys"]:
+        inserted_counts[user_id] = inserted_counts.get(user_id, 0) + 1
+    failed_users = {row[len(SUBMISSION_VALUE_COLUMNS)] for row in result["unapplied_rows"]}
+
+    for user_id in inserted_counts:
+        project_cache.invalidate(user_id)
+        pending_dates_cache.invalidate(user_id)
+
+    logger.info(f"Team submission applied {result['inserted_count']} EM entries for {len(inserted_counts)} users")
+    if result["error"] is not None:
+        logger.error(f"Team submission stopped, {len(failed_users)} users not fully applied: {result['error']}")
+
+    return {
+        user_id: execution_result(inserted_counts.get(user_id, 0), result["error"] if user_id in failed_users else None)
+        for user_id in params_by_user
+    }
@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import pandas as pd
+
+from common.db import get_cursor
+from core.utils.pending_dates import fetch_pending_days_in_range, fetch_team_pending_days_in_range
+from core.utils.projects import get_project_metadata, get_team_project_metadata
+
+
+def summary_entry(entry: Dict[str, Any], project_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summary fields of one submitted EM entry, without its date"""
+    return {
+        "project_id": entry["project_id"],
+        "project_name": project_info["project_name"] if project_info else "",
+        "project_code": project_info["project_code"] if project_info else "",
+        "client_name": project_info["client_name"] if project_info else "",
+        "hours": entry.get("hours", 0),
+        "task_type": entry.get("task_type", ""),
+        "description": entry.get("description", ""),
+        "billing_type": entry.get("billing_type", "Hourly"),
+        "upwork_hours": entry.get("upwork_hours", 0),
+        "time_spend_hours": entry.get("time_spend_hours", entry.get("hours", 0)),
+        "billable_hours": entry.get("billable_hours", entry.get("hours", 0)),
+        "billable_description": entry.get("billable_description", ""),
+        "nonbillable_hours": entry.get("nonbillable_hours", 0),
+        "nonbillable_description": entry.get("nonbillable_description", ""),
+        "qa_required": entry.get("qa_required", False),
+        "task_incharge_name": entry.get("task_incharge_name", ""),
+        "meter_name": entry.get("meter_name", "")
+    }
+
+
+def expand_ranges(ranges: pd.DataFrame, pending_days: pd.DataFrame,
+                  keys: Sequence[str] = ("project_id",)) -> Dict[int, List[str]]:
+    """
+        Join date ranges (entry_index, keys, start_date, end_date) against pending days
+        (keys, em_date) and return the pending dates inside each range, keyed by
+        entry_index, oldest first. Ranges without pending days are absent.
+    """
+    if ranges.empty or pending_days.empty:
+        return {}
+
+    matched = ranges.merge(pending_days, on=list(keys))
+    matched = matched[(matched["em_date"] >= matched["start_date"]) & (matched["em_date"] <= matched["end_date"])]
+    matched = matched.sort_values(["entry_index", "em_date"])
+
+    dates = matched["em_date"].dt.strftime("%Y-%m-%d")
+    return dates.groupby(matched["entry_index"], sort=False).agg(list).to_dict()
+
+
+def fetch_range_pending_days(user_id: str, ranges: pd.DataFrame) -> pd.DataFrame:
+    """Pending working days of the ranges' projects inside the window spanned by the ranges"""
+    with get_cursor() as (connection, cursor):
+        rows = fetch_pending_days_in_range(
+            cursor, user_id, ranges["project_id"].tolist(),
+            ranges["start_date"].min().strftime("%Y-%m-%d"), ranges["end_date"].max().strftime("%Y-%m-%d")
+        )
+        connection.commit()
+
+    pending_days = pd.DataFrame(rows, columns=["project_id", "em_date"])
+    pending_days["em_date"] = pd.to_datetime(pending_days["em_date"])
+    return pending_days
+
+
+def fetch_team_range_pending_days(ranges: pd.DataFrame) -> pd.DataFrame:
+    """Pending working days of the ranges' (user_id, project_id) pairs inside the window spanned by the ranges"""
+    with get_cursor() as (connection, cursor):
+        rows = fetch_team_pending_days_in_range(
+            cursor, list(zip(ranges["user_id"], ranges["project_id"])),
+            ranges["start_date"].min().strftime("%Y-%m-%d"), ranges["end_date"].max().strftime("%Y-%m-%d")
+        )
+        connection.commit()
+
+    pending_days = pd.DataFrame(rows, columns=["user_id", "project_id", "em_date"])
+    pending_days["em_date"] = pd.to_datetime(pending_days["em_date"])
+    return pending_days
+
+
+def range_frame(em_details: List[Dict[str, Any]], date_selection_mode: Optional[str],
+                first_index: int = 0) -> pd.DataFrame:
+    """
+        Date ranges of the EM details that select one, as (entry_index, project_id,
+        start_date, end_date). entry_index counts from first_index.
+    """
+    range_indexes = [
+        index for index, entry in enumerate(em_details)
+        if date_selection_mode == "ranges" and "start_date" in entry and "end_date" in entry
+    ]
+
+    return pd.DataFrame({
+        "entry_index": [first_index + index for index in range_indexes],
+        "project_id": [em_details[index]["project_id"] for index in range_indexes],
+        "start_date": pd.to_datetime([em_details[index]["start_date"] for index in range_indexes], format="%Y-%m-%d"),
+        "end_date": pd.to_datetime([em_details[index]["end_date"] for index in range_indexes], format="%Y-%m-%d"),
+    })
+
+
+def assemble_summary_entries(em_details: List[Dict[str, Any]], range_indexes: Set[int],
+                             range_dates: Dict[int, List[str]], project_metadata: Dict[str, Dict[str, Any]],
+                             first_index: int = 0) -> List[Dict[str, Any]]:
+    """Summary entries of EM details, given the expanded dates of the range entries among them"""
+    expanded_entries = []
+
+    for index, entry in enumerate(em_details, start=first_index):
+        fields = summary_entry(entry, project_metadata.get(entry["project_id"]))
+
+        if index in range_indexes:
+            expanded_entries.extend({"date": date, **fields} for date in range_dates.get(index, []))
+        else:
+            expanded_entries.append({"date": entry.get("date", ""), **fields})
+
+    return expanded_entries
+
+
+def build_summary_entries(user_id: str, em_details: List[Dict[str, Any]],
+                          date_selection_mode: Optional[str]) -> List[Dict[str, Any]]:
+    """
+        One summary entry per (date, project) the EM details cover. Ranges expand only to
+        the user's pending working days of that project; weekends, holidays and dates
+        already submitted inside a range produce no entry.
+    """
+    project_metadata = get_project_metadata(user_id, [entry["project_id"] for entry in em_details])
+
+    ranges = range_frame(em_details, date_selection_mode)
+    range_dates = {}
+    if not ranges.empty:
+        range_dates = expand_ranges(ranges, fetch_range_pending_days(user_id, ranges))
+
+    return assemble_summary_entries(em_details, set(ranges["entry_index"]), range_dates, project_metadata)
+
+
+def build_team_summary_entries(submissions: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+        build_summary_entries for many users' submissions ({user_id, em_details,
+        date_selection_mode}) at once: project metadata and the pending days of every
+        range are each read with one set-based lookup. Returns summary entries by user_id.
+    """
+    team_metadata = get_team_project_metadata(
+        (submission["user_id"], entry["project_id"]) for submission in submissions for entry in submission["em_details"]
+    )
+
+    # Entries are numbered across all submissions so one join expands every user's ranges
+    first_indexes, frames, first_index = [], [], 0
+    for submission in submissions:
+        first_indexes.append(first_index)
+        ranges = range_frame(submission["em_details"], submission.get("date_selection_mode"), first_index)
+        if not ranges.empty:
+            frames.append(ranges.assign(user_id=submission["user_id"]))
+        first_index += len(submission["em_details"])
+
+    range_indexes, range_dates = set(), {}
+    if frames:
+        ranges = pd.concat(frames, ignore_index=True)
+        range_indexes = set(ranges["entry_index"])
+        range_dates = expand_ranges(ranges, fetch_team_range_pending_days(ranges), keys=("user_id", "project_id"))
+
+    project_metadata: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (user_id, project_id), metadata in team_metadata.items():
+        project_metadata.setdefault(user_id, {})[project_id] = metadata
+
+    summaries = {}
+    for submission, first_index in zip(submissions, first_indexes):
+        user_id = submission["user_id"]
+        summaries[user_id] = assemble_summary_entries(submission["em_details"], range_indexes, range_dates,
+                                                      project_metadata.get(user_id, {}), first_index)
+
+    return summaries
@@ -0,0 +1,233 @@
+"""
+Columnar validation of EM summaries and submission parameters.
+
+Rules are evaluated as whole-column operations on a DataFrame (groupby totals,
+duplicate detection, range and membership masks). Python only loops over the
+dates or entries that actually failed, to format their messages in the order
+the checks have always reported them.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from common.db import get_cursor
+from core.utils.projects import get_assigned_projects, get_team_assigned_projects
+from core.utils.submissions import fetch_submission_status
+from core.utils.summary import range_frame
+
+VALID_TASK_TYPES = frozenset(['Development', 'Design', 'HR', 'QA', 'Testing', 'Meeting', 'Review', 'Other'])
+
+DAILY_HOURS = 8
+MAX_ENTRY_HOURS = 8
+
+NO_ENTRIES_ERROR = "No pending EM entries found for the submitted details"
+
+
+def validate_expansion(em_details: List[Dict[str, Any]], date_selection_mode: Optional[str],
+                       entries: List[Dict[str, Any]]) -> List[str]:
+    """
+        Check that EM details expanded to something: every date range must cover at least
+        one pending working day of its project, and the summary must not be empty.
+    """
+    validation_errors = []
+
+    ranges = range_frame(em_details, date_selection_mode)
+    if not ranges.empty:
+        covered = pd.DataFrame({
+            "project_id": pd.Series([entry["project_id"] for entry in entries], dtype=object),
+            "em_date": pd.to_datetime(pd.Series([entry["date"] for entry in entries], dtype=object),
+                                      format="%Y-%m-%d", errors="coerce"),
+        })
+        matched = ranges.merge(covered, on="project_id")
+        in_range = (matched["em_date"] >= matched["start_date"]) & (matched["em_date"] <= matched["end_date"])
+        empty = ranges.loc[~ranges["entry_index"].isin(matched.loc[in_range, "entry_index"])]
+
+        for project_id, start_date, end_date in zip(empty["project_id"], empty["start_date"], empty["end_date"]):
+            validation_errors.append(f"No pending working days for project {project_id} "
+                                     f"between {start_date:%Y-%m-%d} and {end_date:%Y-%m-%d}")
+
+    if not entries and not validation_errors:
+        validation_errors.append(NO_ENTRIES_ERROR)
+
+    return validation_errors
+
+
+def validate_summary(entries: List[Dict[str, Any]]) -> List[str]:
+    """
+        Check an expanded EM summary: each date must total DAILY_HOURS, no entry may exceed
+        MAX_ENTRY_HOURS, and a project may appear only once per date.
+    """
+    if not entries:
+        return []
+
+    hours = [entry["hours"] for entry in entries]
+    hours_values = np.asarray(hours, dtype=float)
+    # Dates and projects as integer codes, dates numbered in order of first appearance
+    date_codes, dates = pd.factorize(pd.Series([entry["date"] for entry in entries], dtype=object))
+    project_codes, projects = pd.factorize(pd.Series([entry["project_id"] for entry in entries], dtype=object))
+    date_count = len(dates)
+
+    totals = np.bincount(date_codes, weights=hours_values, minlength=date_count)
+    wrong_total = totals != DAILY_HOURS
+
+    over_limit = hours_values > MAX_ENTRY_HOURS
+    has_over_limit = np.bincount(date_codes, weights=over_limit, minlength=date_count) > 0
+
+    duplicated = pd.Series(date_codes.astype(np.int64) * max(len(projects), 1) + project_codes).duplicated().to_numpy()
+    has_duplicate = np.bincount(date_codes, weights=duplicated, minlength=date_count) > 0
+
+    # Sums are float here; only dates that had float hours report a float total
+    float_dates = set()
+    if wrong_total.any():
+        float_dates = {date_codes[idx] for idx, value in enumerate(hours) if isinstance(value, float)}
+
+    over_limit_names: Dict[int, List[str]] = {}
+    for idx in np.flatnonzero(over_limit):
+        over_limit_names.setdefault(date_codes[idx], []).append(entries[idx]["project_name"])
+
+    validation_errors = []
+    for code in np.flatnonzero(wrong_total | has_over_limit | has_duplicate):
+        entry_date = dates[code]
+        if wrong_total[code]:
+            total_hours = float(totals[code]) if code in float_dates else int(totals[code])
+            validation_errors.append(f"Total hours for {entry_date} exceed 24 hours ({total_hours}h)")
+
+        for project_name in over_limit_names.get(code, []):
+            validation_errors.append(f"Hours for {project_name} on {entry_date} cannot exceed {MAX_ENTRY_HOURS} hours")
+
+        if has_duplicate[code]:
+            validation_errors.append(f"Duplicate project entries found for {entry_date}")
+
+    return validation_errors
+
+
+def submission_frame(sql_params: Dict[str, List[Any]]) -> pd.DataFrame:
+    """
+        Columnar view of submission parameters with parsed dates. iso_date is the
+        normalized YYYY-MM-DD date, or None where em_date does not parse.
+    """
+    em_dates = pd.Series(sql_params["em_date"], dtype=object)
+    is_text = np.fromiter((isinstance(value, str) for value in em_dates), dtype=bool, count=len(em_dates))
+    parsed = pd.to_datetime(em_dates.where(is_text), format="%Y-%m-%d", errors="coerce")
+    iso_dates = np.where(parsed.isna(), None, parsed.to_numpy().astype("datetime64[D]").astype(str))
+
+    return pd.DataFrame({
+        # object dtype keeps the entered Python values, so type checks see ints and floats as sent
+        "time_spend_hours": pd.Series(sql_params["time_spend_hours"], dtype=object),
+        "em_date": em_dates,
+        "task_type": pd.Series(sql_params["task_type"], dtype=object),
+        "project_id": pd.Series(sql_params["project_id"], dtype=object),
+        "parsed_date": parsed,
+        "iso_date": iso_dates,
+    })
+
+
+def validate_submission_entries(frame: pd.DataFrame) -> List[str]:
+    """Per-entry checks that need no database: hours range, date format and task type"""
+    hours = frame["time_spend_hours"]
+    is_number = hours.map(lambda value: isinstance(value, (int, float))).astype(bool)
+    numeric_hours = pd.to_numeric(hours.where(is_number), errors="coerce")
+
+    bad_hours = ~is_number | (numeric_hours < 0) | (numeric_hours > MAX_ENTRY_HOURS)
+    bad_date = frame["parsed_date"].isna()
+    bad_task = ~frame["task_type"].isin(VALID_TASK_TYPES)
+
+    failing = np.flatnonzero((bad_hours | bad_date | bad_task).to_numpy())
+    hours_values, dates, task_types = hours.to_numpy(), frame["em_date"].to_numpy(), frame["task_type"].to_numpy()
+    bad_hours, bad_date, bad_task = bad_hours.to_numpy(), bad_date.to_numpy(), bad_task.to_numpy()
+
+    validation_errors = []
+    for idx in failing:
+        if bad_hours[idx]:
+            validation_errors.append(f"Invalid hours for entry {idx}: {hours_values[idx]}")
+        if bad_date[idx]:
+            validation_errors.append(f"Invalid date format: {dates[idx]}")
+        if bad_task[idx]:
+            validation_errors.append(f"Invalid task type: {task_types[idx]}")
+
+    return validation_errors
+
+
+def submission_keys(frame: pd.DataFrame, user_id: str) -> List[Tuple[str, str, str]]:
+    """(user_id, em_date, project_id) keys of the entries whose date parses"""
+    valid = frame.loc[frame["parsed_date"].notna()]
+    return [(user_id, iso_date, project_id) for iso_date, project_id in zip(valid["iso_date"], valid["project_id"])]
+
+
+def validate_submission_targets(frame: pd.DataFrame, user_id: str, assigned_projects: Set[str],
+                                submitted_keys: Iterable[Tuple[str, str, str]], today: date) -> List[str]:
+    """Checks against the user's data: project assignment, future dates and already-submitted EMs"""
+    submitted_pairs = {(iso_date, project_id) for key_user, iso_date, project_id in submitted_keys if key_user == user_id}
+
+    valid_date = frame["parsed_date"].notna().to_numpy()
+    not_assigned = ~frame["project_id"].isin(assigned_projects).to_numpy()
+    future = valid_date & (frame["parsed_date"] > pd.Timestamp(today)).to_numpy()
+    submitted = valid_date & np.fromiter(
+        (pair in submitted_pairs for pair in zip(frame["iso_date"], frame["project_id"])), dtype=bool, count=len(frame)
+    ) if submitted_pairs else np.zeros(len(frame), dtype=bool)
+
+    dates, project_ids = frame["em_date"].to_numpy(), frame["project_id"].to_numpy()
+
+    validation_errors = []
+    for idx in np.flatnonzero(not_assigned | future | submitted):
+        if not_assigned[idx]:
+            validation_errors.append(f"Project {project_ids[idx]} not assigned to user")
+        if future[idx]:
+            validation_errors.append(f"Cannot submit EM for future date: {dates[idx]}")
+        if submitted[idx]:
+            validation_errors.append(f"EM already submitted for {dates[idx]}, {project_ids[idx]}")
+
+    return validation_errors
+
+
+def validate_submission(user_id: str, sql_params: Dict[str, List[Any]], today: Optional[date] = None) -> List[str]:
+    """All business-rule checks of a user's submission parameters, including the database lookups"""
+    frame = submission_frame(sql_params)
+    validation_errors = validate_submission_entries(frame)
+
+    assigned_projects = get_assigned_projects(user_id, sql_params["project_id"])
+
+    with get_cursor() as (connection, cursor):
+        submission_status = fetch_submission_status(cursor, submission_keys(frame, user_id))
+        connection.commit()
+
+    submitted_keys = [key for key, is_submitted in submission_status.items() if is_submitted]
+    validation_errors.extend(
+        validate_submission_targets(frame, user_id, assigned_projects, submitted_keys, today or datetime.now().date())
+    )
+    return validation_errors
+
+
+def validate_team_submissions(params_by_user: Dict[str, Dict[str, List[Any]]],
+                              today: Optional[date] = None) -> Dict[str, List[str]]:
+    """
+        validate_submission for many users at once. Project assignments and submission
+        status of every user's entries are each read with one set-based lookup.
+        Returns the validation errors by user_id.
+    """
+    frames = {user_id: submission_frame(sql_params) for user_id, sql_params in params_by_user.items()}
+
+    assigned_projects = get_team_assigned_projects(
+        (user_id, project_id) for user_id, sql_params in params_by_user.items() for project_id in sql_params["project_id"]
+    )
+
+    with get_cursor() as (connection, cursor):
+        submission_status = fetch_submission_status(
+            cursor, [key for user_id, frame in frames.items() for key in submission_keys(frame, user_id)]
+        )
+        connection.commit()
+
+    submitted_keys: Dict[str, List[Tuple[str, str, str]]] = {}
+    for key, is_submitted in submission_status.items():
+        if is_submitted:
+            submitted_keys.setdefault(key[0], []).append(key)
+
+    today = today or datetime.now().date()
+    return {
+        user_id: validate_submission_entries(frame) + validate_submission_targets(
+            frame, user_id, assigned_projects.get(user_id, set()), submitted_keys.get(user_id, []), today
+        )
+        for user_id, frame in frames.items()
+    }
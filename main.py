@@ -1,9 +1,54 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from langgraph.types import Command
 
-app = FastAPI()
+from common.db import DB_POOL_SIZE
+from common.log import logger
+from common.responses import CompressionMiddleware, ORJSONResponse, dumps
+from core.graph import create_workflow
+from core.state import EMState
+
+WORKFLOW_MAX_WORKERS = int(os.getenv("WORKFLOW_MAX_WORKERS", str(DB_POOL_SIZE)))
+
+# Workflow state that only the graph itself needs; never sent back to clients
+INTERNAL_STATE_KEYS = frozenset({"sql_query", "sql_params"})
+
+# List payloads that /process can return as a first page, and the field each is keyed on
+# by the matching GET /users/{user_id}/... endpoint
+PAGED_PAYLOADS = {
+    "pending_dates": None,
+    "available_projects": "project_id",
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Compile the workflow graph once at startup and share it across requests."""
+    started = time.perf_counter()
+    app.state.workflow = create_workflow()
+    logger.info(f"Compiled EM workflow in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Graph execution and mysql-connector calls are blocking, so they run on a bounded
+    # executor sized to the connection pool instead of on the event loop.
+    app.state.workflow_executor = ThreadPoolExecutor(max_workers=WORKFLOW_MAX_WORKERS,
+                                                     thread_name_prefix="em-workflow")
+
+    yield
+
+    app.state.workflow_executor.shutdown(wait=True)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(CompressionMiddleware)
 
 
 class EMRequest(BaseModel):
@@ -17,6 +62,20 @@ class EMRequest(BaseModel):
     em_details: Optional[List[Dict[str, Any]]] = None
     approval_data: Optional[Dict[str, Any]] = None
 
+    # Return only the first page_size pending dates / projects, plus a <key>_next_after cursor.
+    # This trims the response only; see first_page.
+    page_size: Optional[int] = Field(None, ge=1)
+
+
+class EMSubmitRequest(BaseModel):
+    user_id: str
+    em_details: List[Dict[str, Any]]
+    date_selection_mode: Optional[str] = None
+
+
+class EMTeamSubmitRequest(BaseModel):
+    submissions: List[EMSubmitRequest]
+
 
 class EMResponse(BaseModel):
     status: str
@@ -24,19 +83,88 @@ class EMResponse(BaseModel):
     message: Optional[str] = None
 
 
+async def run_workflow(workflow, workflow_input, config):
+    """Run a blocking workflow invocation on the workflow executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.workflow_executor, partial(workflow.invoke, workflow_input, config=config))
+
+
+async def has_pending_interrupt(workflow, config) -> bool:
+    """Check whether the thread still has an interrupted run waiting to be resumed."""
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(app.state.workflow_executor, workflow.get_state, config)
+    # A node that interrupts again after a resume (summary -> approval) already has
+    # the resume write pending, so it is missing from snapshot.next
+    return bool(snapshot.next or snapshot.interrupts)
+
+
+def em_response(status: str, data: Optional[Dict[str, Any]] = None, message: Optional[str] = None) -> ORJSONResponse:
+    """
+        Render an EMResponse straight to orjson, skipping pydantic re-validation of the
+        payload. Internal state keys and unset fields are left out.
+    """
+    content: Dict[str, Any] = {"status": status}
+    if data is not None:
+        content["data"] = {key: value for key, value in data.items()
+                           if value is not None and key not in INTERNAL_STATE_KEYS}
+    if message is not None:
+        content["message"] = message
+    return ORJSONResponse(content)
+
+
+def first_page(data: Dict[str, Any], page_size: int) -> Dict[str, Any]:
+    """
+        Cut the list payloads in data down to their first page. Each cut list gets a
+        <key>_next_after cursor for GET /users/{user_id}/... and a <key>_total count.
+
+        Only the response is paged: the workflow nodes still load the full lists, keep
+        them in the checkpoint and cache them. Clients that need bounded memory for very
+        long lists should read them from the GET endpoints instead.
+
+        A paged project list is in project_id order, not the node's project_name order,
+        because its next_after cursor continues in the order of the projects endpoint.
+        <key>_order names the order of each cut list. The date-selection dates continue
+        with the selected projects as project_id filters.
+    """
+    data = dict(data)
+
+    for key, cursor_field in PAGED_PAYLOADS.items():
+        items = data.get(key)
+        if not isinstance(items, list):
+            continue
+        if cursor_field is not None:
+            items = sorted(items, key=lambda item: item[cursor_field])
+            data[f"{key}_order"] = cursor_field
+
+        page = items[:page_size]
+        data[key] = page
+        data[f"{key}_total"] = len(items)
+        data[f"{key}_next_after"] = None
+        if len(items) > page_size:
+            last = page[-1]
+            data[f"{key}_next_after"] = last[cursor_field] if cursor_field is not None else last
+
+    return data
+
+
 @app.post("/process", response_model=EMResponse)
 async def process_em_request(request: EMRequest):
     """Single endpoint to handle all EM workflow stages."""
 
-    from core.graph import create_workflow
-    from core.state import EMState
-
-    workflow = create_workflow()
+    # The compiled graph holds no per-run state (that lives in the checkpointer,
+    # keyed by thread_id), so one instance is safe to invoke from many threads.
+    workflow = app.state.workflow
 
     thread_id = request.user_id
     config = {"configurable": {"thread_id": thread_id}}
 
     try:
+        if not request.is_initial and not await has_pending_interrupt(workflow, config):
+            return em_response(
+                status="session_expired",
+                message="Your EM session has expired. Please start again."
+            )
+
         if request.is_initial:
             initial_state = EMState(
                 intent=None,
@@ -44,47 +172,172 @@ async def process_em_request(request: EMRequest):
                 query=request.query,
                 stage=""
             )
-            result = workflow.invoke(initial_state, config=config)
+            result = await run_workflow(workflow, initial_state, config)
 
         elif request.selected_projects:
-            result = workflow.invoke(
-                Command(resume=request.selected_projects),
-                config=config
-            )
+            result = await run_workflow(workflow, Command(resume=request.selected_projects), config)
 
         elif request.date_selection:
-            result = workflow.invoke(
-                Command(resume=request.date_selection),
-                config=config
-            )
+            result = await run_workflow(workflow, Command(resume=request.date_selection), config)
         elif request.em_details:
-            result = workflow.invoke(
-                Command(resume=request.em_details),
-                config=config
-            )
+            result = await run_workflow(workflow, Command(resume=request.em_details), config)
 
         elif request.approval_data:
-            result = workflow.invoke(
-                Command(resume=request.approval_data),
-                config=config
-            )
+            result = await run_workflow(workflow, Command(resume=request.approval_data), config)
 
         else:
             raise HTTPException(status_code=400, detail="Invalid request")
 
         if "__interrupt__" in result:
             interrupt_data = result["__interrupt__"][0].value
-            return EMResponse(
+            if request.page_size:
+                interrupt_data = first_page(interrupt_data, request.page_size)
+            return em_response(
                 status=interrupt_data["status"],
                 data=interrupt_data,
                 message=interrupt_data.get("message")
             )
 
-        return EMResponse(
+        if request.page_size:
+            result = first_page(result, request.page_size)
+
+        return em_response(
             status="completed",
             data=result,
             message="Workflow completed successfully"
         )
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/submit", response_model=EMResponse)
+async def submit_em(request: EMSubmitRequest):
+    """Submit complete EM details in one call, without interrupts or checkpoints."""
+    from core.submit import submit_em_details
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            app.state.workflow_executor,
+            partial(submit_em_details, request.user_id, request.em_details, request.date_selection_mode)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return em_response(status=result["status"], data=result["data"], message=result["message"])
+
+
+@app.post("/submit/team", response_model=EMResponse)
+async def submit_team_em(request: EMTeamSubmitRequest):
+    """Submit complete EM details of many users in one call, with per-user results."""
+    from core.submit import submit_team_em_details
+
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="No submissions given")
+
+    user_ids = [submission.user_id for submission in request.submissions]
+    if len(set(user_ids)) != len(user_ids):
+        raise HTTPException(status_code=400, detail="Each user may appear only once per team submission")
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            app.state.workflow_executor,
+            partial(submit_team_em_details, [submission.model_dump() for submission in request.submissions])
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return em_response(status=result["status"], data=result["data"], message=result["message"])
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield dumps(item) + b"\n"
+
+
+@app.get("/users/{user_id}/pending-dates")
+async def list_pending_dates(user_id: str, limit: int = Query(100, ge=1, le=1000), after: Optional[str] = None,
+                             project_id: Optional[List[str]] = Query(None)):
+    """A page of the user's pending dates after the given YYYY-MM-DD date, oldest first, optionally for some projects."""
+    from core.utils.pending_dates import get_pending_dates_page
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.workflow_executor,
+                                      partial(get_pending_dates_page, user_id, limit, after, project_id))
+
+
+@app.get("/users/{user_id}/pending-dates.ndjson")
+async def stream_pending_dates(user_id: str, after: Optional[str] = None, project_id: Optional[List[str]] = Query(None)):
+    """All of the user's pending dates after the given date, one JSON object per line."""
+    from core.utils.pending_dates import iter_pending_dates
+
+    lines = ndjson_lines({"em_date": em_date} for em_date in iter_pending_dates(user_id, after, project_id))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.get("/users/{user_id}/projects")
+async def list_user_projects(user_id: str, limit: int = Query(100, ge=1, le=1000), after: Optional[str] = None):
+    """A page of the user's assigned projects after the given project_id, in project_id order."""
+    from core.utils.projects import get_user_projects_page
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.workflow_executor, partial(get_user_projects_page, user_id, limit, after))
+
+
+@app.get("/users/{user_id}/projects.ndjson")
+async def stream_user_projects(user_id: str, after: Optional[str] = None):
+    """All of the user's assigned projects after the given project_id, one JSON object per line."""
+    from core.utils.projects import iter_user_projects
+
+    return StreamingResponse(ndjson_lines(iter_user_projects(user_id, after)), media_type="application/x-ndjson")
+
+
+@app.get("/reports/summary")
+async def report_summary():
+    """Total records, users and submitted/pending EM counts."""
+    from core.utils.reports import get_summary
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.workflow_executor, get_summary)
+
+
+@app.get("/reports/pending-by-user")
+async def report_pending_by_user(limit: int = Query(50, ge=1, le=500), after: Optional[str] = None):
+    """Per-user pending counts, paged by user_id. Pass next_after back as after for the next page."""
+    from core.utils.reports import get_pending_by_user
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.workflow_executor, partial(get_pending_by_user, limit, after))
+
+
+@app.get("/reports/pending-stats/{user_id}")
+async def report_pending_stats(user_id: str):
+    """A user's pending counters, in total and per project, from em_pending_stats."""
+    from core.utils.pending_stats import get_user_pending_stats
+
+    loop = asyncio.get_running_loop()
+    stats = await loop.run_in_executor(app.state.workflow_executor, get_user_pending_stats, user_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No pending stats for user {user_id}")
+    return stats
+
+
+@app.get("/metrics/checkpoints")
+async def checkpoint_metrics():
+    """Resident checkpoint sessions and bytes for the workflow checkpointer."""
+    from core.graph import checkpointer
+
+    if not hasattr(checkpointer, "stats"):
+        return {"backend": type(checkpointer).__name__}
+    return checkpointer.stats()
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    """Hit/miss counters of the shared workflow caches."""
+    from core.utils.pending_dates import pending_dates_cache
+    from core.utils.projects import project_cache
+
+    return {"project_metadata": project_cache.stats(), "pending_dates": pending_dates_cache.stats()}